@@ -0,0 +1,11 @@
+"""Настройки pytest проекта; тесты курса в tests/ не меняются.
+
+Как AuditingTestRunner для manage.py test, включает проверку контекста
+шаблонов: QuerySet без LIMIT в контексте роняет рендер.
+"""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def template_context_audit(settings):
+    settings.TEMPLATE_CONTEXT_AUDIT = True
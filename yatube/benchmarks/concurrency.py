@@ -0,0 +1,112 @@
+"""Пропускная способность WSGI-пути под параллельной нагрузкой.
+
+Приложение поднимается в ThreadedWSGIServer — как воркер с потоками, —
+и каждое представление чтения нагружается concurrency клиентами
+одновременно по настоящему HTTP.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer,
+    WSGIRequestHandler,
+)
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+
+from .runner import build_scenarios, percentile
+
+
+class QuietHandler(WSGIRequestHandler):
+    # Headers and body go out in separate writes; without this Nagle's
+    # algorithm adds ~40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server:
+    """Приложение в потоке на свободном порту 127.0.0.1."""
+
+    def __enter__(self):
+        self.httpd = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler)
+        self.httpd.set_app(get_wsgi_application())
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        host, port = self.httpd.server_address
+        self.url = f"http://{host}:{port}"
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+
+def session_cookie(user):
+    client = Client()
+    client.force_login(user)
+    return {
+        settings.SESSION_COOKIE_NAME: client.cookies[
+            settings.SESSION_COOKIE_NAME
+        ].value
+    }
+
+
+def load(url, concurrency, requests_per_client, cookies=None):
+    """concurrency клиентов по requests_per_client запросов каждый."""
+
+    def client():
+        timings, errors = [], 0
+        with requests.Session() as session:
+            # No proxy or .netrc lookups on every request.
+            session.trust_env = False
+            session.cookies.update(cookies or {})
+            for _ in range(requests_per_client):
+                started = time.perf_counter()
+                response = session.get(url, allow_redirects=False)
+                timings.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+        return timings, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda _: client(), range(concurrency)))
+    elapsed = time.perf_counter() - started
+    timings = [timing for batch, _ in results for timing in batch]
+    return timings, sum(errors for _, errors in results), elapsed
+
+
+def run(concurrency, requests_per_client, only=None):
+    reader, scenarios = build_scenarios()
+    cookies = session_cookie(reader) if reader is not None else None
+    results = []
+    with Server() as server:
+        for scenario in scenarios:
+            if scenario.method != "get" or scenario.setup:
+                continue
+            if only and scenario.name not in only:
+                continue
+            timings, errors, elapsed = load(
+                server.url + scenario.url,
+                concurrency,
+                requests_per_client,
+                cookies if scenario.login else None,
+            )
+            results.append(
+                {
+                    "view": scenario.name,
+                    "concurrency": concurrency,
+                    "requests": len(timings),
+                    "rps": round(len(timings) / elapsed, 1),
+                    "p50_ms": round(percentile(timings, 0.50) * 1000, 3),
+                    "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+                    "errors": errors,
+                }
+            )
+    return results
@@ -0,0 +1,160 @@
+"""Конкурентная запись в SQLite: настройки по умолчанию против core.db.
+
+Писатели повторяют то, что делает add_comment: читают пост, добавляют
+комментарий и увеличивают счётчик в одной транзакции. Читатели в это
+время листают ленту. Каждый профиль работает со своим временным файлом
+базы, потому что WAL и блокировки имеют смысл только для файла.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from core.db.base import apply_pragmas
+
+from .runner import percentile
+
+SCHEMA = (
+    "CREATE TABLE post ("
+    " id INTEGER PRIMARY KEY, text TEXT, comments_count INTEGER)",
+    "CREATE TABLE comment ("
+    " id INTEGER PRIMARY KEY, post_id INTEGER, text TEXT)",
+    "CREATE INDEX comment_post_idx ON comment (post_id)",
+)
+
+
+def profiles():
+    """(имя, PRAGMA, начало транзакции) для сравнения."""
+    return (
+        ("default", {}, "BEGIN"),
+        ("pragmas", settings.SQLITE_PRAGMAS, "BEGIN"),
+        ("tuned", settings.SQLITE_PRAGMAS, "BEGIN IMMEDIATE"),
+    )
+
+
+def connect(path, pragmas):
+    # isolation_level=None: transactions are issued explicitly, as Django
+    # does for atomic blocks.
+    connection = sqlite3.connect(
+        path, timeout=5, isolation_level=None, check_same_thread=False
+    )
+    apply_pragmas(connection, pragmas)
+    return connection
+
+
+def prepare(path, posts):
+    connection = sqlite3.connect(path, isolation_level=None)
+    for statement in SCHEMA:
+        connection.execute(statement)
+    connection.executemany(
+        "INSERT INTO post (id, text, comments_count) VALUES (?, ?, 0)",
+        [(pk, f"post {pk}") for pk in range(1, posts + 1)],
+    )
+    connection.close()
+
+
+def write(connection, begin, post_id, text):
+    connection.execute(begin)
+    try:
+        connection.execute(
+            "SELECT comments_count FROM post WHERE id = ?", (post_id,)
+        ).fetchone()
+        connection.execute(
+            "INSERT INTO comment (post_id, text) VALUES (?, ?)",
+            (post_id, text),
+        )
+        connection.execute(
+            "UPDATE post SET comments_count = comments_count + 1"
+            " WHERE id = ?",
+            (post_id,),
+        )
+        connection.execute("COMMIT")
+    except sqlite3.OperationalError:
+        connection.execute("ROLLBACK")
+        raise
+
+
+def read(connection, post_id):
+    connection.execute("BEGIN")
+    try:
+        connection.execute(
+            "SELECT id, text, comments_count FROM post"
+            " ORDER BY id DESC LIMIT 10"
+        ).fetchall()
+        connection.execute(
+            "SELECT text FROM comment WHERE post_id = ?", (post_id,)
+        ).fetchall()
+    finally:
+        connection.execute("COMMIT")
+
+
+def run_profile(pragmas, begin, writers, readers, transactions, posts=50):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "contention.sqlite3")
+        prepare(path, posts)
+        write_timings, read_timings = [], []
+        errors = {"write": 0, "read": 0}
+        lock = threading.Lock()
+        start = threading.Barrier(writers + readers)
+
+        def worker(kind, number):
+            connection = connect(path, pragmas)
+            timings = write_timings if kind == "write" else read_timings
+            start.wait()
+            for i in range(transactions):
+                post_id = (number + i) % posts + 1
+                started = time.perf_counter()
+                try:
+                    if kind == "write":
+                        write(connection, begin, post_id, f"{number}-{i}")
+                    else:
+                        read(connection, post_id)
+                except sqlite3.OperationalError:
+                    with lock:
+                        errors[kind] += 1
+                    continue
+                elapsed = time.perf_counter() - started
+                with lock:
+                    timings.append(elapsed)
+            connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=("write", n))
+            for n in range(writers)
+        ] + [
+            threading.Thread(target=worker, args=("read", n))
+            for n in range(readers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    p95 = {
+        kind: round(percentile(timings, 0.95) * 1000, 3) if timings else None
+        for kind, timings in (("write", write_timings), ("read", read_timings))
+    }
+    return {
+        "writes": len(write_timings),
+        "reads": len(read_timings),
+        "write_errors": errors["write"],
+        "read_errors": errors["read"],
+        "writes_per_s": round(len(write_timings) / elapsed, 1),
+        "reads_per_s": round(len(read_timings) / elapsed, 1),
+        "write_p95_ms": p95["write"],
+        "read_p95_ms": p95["read"],
+    }
+
+
+def run(writers=8, readers=8, transactions=200):
+    return [
+        dict(
+            profile=name,
+            **run_profile(pragmas, begin, writers, readers, transactions),
+        )
+        for name, pragmas, begin in profiles()
+    ]
@@ -0,0 +1,100 @@
+"""Генератор реалистичных данных для бенчмарков.
+
+Активность распределена по степенному закону: немногие авторы пишут
+большую часть постов и собирают большую часть подписчиков.
+"""
+import random
+
+from django.contrib.auth import get_user_model
+from mixer.backend.django import Mixer
+
+from posts import counters, search, timeline
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+
+
+def power_law_weights(size, alpha):
+    return [1 / (rank + 1) ** alpha for rank in range(size)]
+
+
+def populate(users, groups, posts, comments, follows, alpha=1.2, seed=0):
+    """Заполняет базу и возвращает созданные объекты по моделям."""
+    rng = random.Random(seed)
+    mixer = Mixer(commit=False)
+
+    User.objects.bulk_create(
+        mixer.cycle(users).blend(
+            User, username=mixer.sequence("bench_user_{0}")
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    # SQLite does not return primary keys from bulk_create in Django 2.2.
+    authors = list(
+        User.objects.filter(username__startswith="bench_user_").order_by("pk")
+    )
+    weights = power_law_weights(len(authors), alpha)
+
+    Group.objects.bulk_create(
+        mixer.cycle(groups).blend(Group, slug=mixer.sequence("bench-{0}")),
+        batch_size=BATCH_SIZE,
+    )
+    group_list = list(Group.objects.filter(slug__startswith="bench-"))
+
+    post_authors = rng.choices(authors, weights, k=posts)
+    Post.objects.bulk_create(
+        (
+            mixer.blend(
+                Post,
+                author=author,
+                group=rng.choice(group_list + [None]) if group_list else None,
+                image="",
+            )
+            for author in post_authors
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    post_ids = list(
+        Post.objects.filter(author__in=authors).values_list("pk", flat=True)
+    )
+    if post_ids:
+        # Popular posts attract most of the comments too.
+        post_weights = power_law_weights(len(post_ids), alpha)
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    post_id=post_id,
+                    author=rng.choice(authors),
+                    text=mixer.faker.sentence(),
+                )
+                for post_id in rng.choices(post_ids, post_weights, k=comments)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+    edges = set()
+    attempts = 0
+    while len(edges) < follows and attempts < follows * 10:
+        attempts += 1
+        user = rng.choice(authors)
+        author = rng.choices(authors, weights)[0]
+        if user != author:
+            edges.add((user.pk, author.pk))
+    Follow.objects.bulk_create(
+        [Follow(user_id=user, author_id=author) for user, author in edges],
+        batch_size=BATCH_SIZE,
+    )
+
+    # bulk_create skips signals: rebuild everything they maintain.
+    counters.reconcile()
+    timeline.backfill()
+    search.get_engine().rebuild()
+    return {
+        "users": len(authors),
+        "groups": len(group_list),
+        "posts": len(post_ids),
+        "comments": Comment.objects.filter(post__in=post_ids).count(),
+        "follows": len(edges),
+    }
@@ -0,0 +1,133 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, teardown_databases
+
+from benchmarks import concurrency, data, runner
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет временную тестовую базу и замеряет представления posts: "
+        "p50/p95, число SQL-запросов и размер ответа"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--groups", type=int, default=10)
+        parser.add_argument("--posts", type=int, default=2000)
+        parser.add_argument("--comments", type=int, default=5000)
+        parser.add_argument("--follows", type=int, default=3000)
+        parser.add_argument(
+            "--alpha",
+            type=float,
+            default=1.2,
+            help="показатель степенного распределения активности",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--cold-cache",
+            action="store_true",
+            help="очищать кэш перед каждым запросом",
+        )
+        parser.add_argument(
+            "--view",
+            action="append",
+            dest="views",
+            help="замерить только указанные представления",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            action="append",
+            help=(
+                "дополнительно нагрузить WSGI-сервер столькими клиентами "
+                "одновременно; можно указать несколько раз"
+            ),
+        )
+        parser.add_argument("--requests-per-client", type=int, default=20)
+        parser.add_argument(
+            "--output", help="записать результаты в JSON-файл"
+        )
+
+    def handle(self, *args, **options):
+        # Never touch the configured database: work in a throwaway copy.
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            dataset = data.populate(
+                users=options["users"],
+                groups=options["groups"],
+                posts=options["posts"],
+                comments=options["comments"],
+                follows=options["follows"],
+                alpha=options["alpha"],
+                seed=options["seed"],
+            )
+            results = runner.run(
+                options["iterations"],
+                warmup=options["warmup"],
+                cold_cache=options["cold_cache"],
+                only=options["views"],
+            )
+            concurrent = [
+                row
+                for level in options["concurrency"] or ()
+                for row in concurrency.run(
+                    level,
+                    options["requests_per_client"],
+                    only=options["views"],
+                )
+            ]
+        finally:
+            teardown_databases(old_config, verbosity=0)
+        params = {
+            name: options[name]
+            for name in (
+                "alpha",
+                "seed",
+                "iterations",
+                "warmup",
+                "cold_cache",
+                "views",
+                "concurrency",
+                "requests_per_client",
+            )
+        }
+        report = {
+            "dataset": dataset,
+            "params": params,
+            "results": results,
+            "concurrent": concurrent,
+        }
+        self.print_table(results)
+        if concurrent:
+            self.print_concurrent(concurrent)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2, default=str)
+
+    def print_table(self, results):
+        header = "{:<18}{:>10}{:>10}{:>10}{:>12}".format(
+            "view", "p50 ms", "p95 ms", "queries", "bytes"
+        )
+        self.stdout.write(header)
+        for row in results:
+            self.stdout.write(
+                "{view:<18}{p50_ms:>10.2f}{p95_ms:>10.2f}"
+                "{queries_avg:>10.1f}{bytes_avg:>12}".format(**row)
+            )
+
+    def print_concurrent(self, rows):
+        self.stdout.write("")
+        self.stdout.write(
+            "{:<18}{:>8}{:>10}{:>10}{:>10}{:>8}".format(
+                "view", "clients", "req/s", "p50 ms", "p95 ms", "errors"
+            )
+        )
+        for row in rows:
+            self.stdout.write(
+                "{view:<18}{concurrency:>8}{rps:>10.1f}{p50_ms:>10.2f}"
+                "{p95_ms:>10.2f}{errors:>8}".format(**row)
+            )
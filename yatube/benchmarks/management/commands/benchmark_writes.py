@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from benchmarks import contention
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает конкурентную запись в SQLite с настройками по умолчанию "
+        "и с SQLITE_PRAGMAS и BEGIN IMMEDIATE (core.db)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=200,
+            help="транзакций на поток",
+        )
+        parser.add_argument(
+            "--output", help="записать результаты в JSON-файл"
+        )
+
+    def handle(self, *args, **options):
+        results = contention.run(
+            options["writers"], options["readers"], options["transactions"]
+        )
+        self.stdout.write(
+            "{:<10}{:>10}{:>10}{:>10}{:>10}{:>12}".format(
+                "profile", "writes/s", "reads/s", "w errors", "r errors",
+                "w p95 ms",
+            )
+        )
+        for row in results:
+            self.stdout.write(
+                "{profile:<10}{writes_per_s:>10.1f}{reads_per_s:>10.1f}"
+                "{write_errors:>10}{read_errors:>10}{write_p95:>12}".format(
+                    write_p95=row["write_p95_ms"] or "-", **row
+                )
+            )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
@@ -0,0 +1,177 @@
+"""Замеры представлений posts через тестовый клиент."""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name, timings, queries, sizes, statuses):
+    return {
+        "view": name,
+        "requests": len(timings),
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+        "queries_avg": round(sum(queries) / len(queries), 2),
+        "queries_max": max(queries),
+        "bytes_avg": round(sum(sizes) / len(sizes)),
+        "statuses": sorted(set(statuses)),
+    }
+
+
+class Scenario:
+    """Одно представление: метод, адрес и данные запроса."""
+
+    def __init__(
+        self, name, url, method="get", data=None, login=False, setup=None
+    ):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.data = data
+        self.login = login
+        # Runs untimed before every request, e.g. to reset follow state.
+        self.setup = setup
+
+    def request(self, client, iteration):
+        data = self.data(iteration) if callable(self.data) else self.data
+        return getattr(client, self.method)(self.url, data)
+
+
+def build_scenarios():
+    """Сценарии по самым нагруженным объектам сгенерированных данных.
+
+    Сценарий без нужного объекта (нет постов, групп, подписок или
+    второго пользователя) пропускается; reader — None, если
+    пользователей нет совсем.
+    """
+    post = Post.objects.order_by("-comments_count", "pk").first()
+    group = Group.objects.order_by("-posts_count", "pk").first()
+    reader = (
+        User.objects.filter(follower__isnull=False).order_by("pk").first()
+        or User.objects.order_by("pk").first()
+    )
+    target = None
+    if reader is not None:
+        target = User.objects.exclude(pk=reader.pk).order_by("-pk").first()
+
+    scenarios = [Scenario("index", reverse("posts:index"))]
+    if group is not None:
+        scenarios.append(
+            Scenario(
+                "group_posts",
+                reverse("posts:group_list", kwargs={"slug": group.slug}),
+            )
+        )
+    if post is not None:
+        scenarios += [
+            Scenario(
+                "profile",
+                reverse(
+                    "posts:profile",
+                    kwargs={"username": post.author.username},
+                ),
+            ),
+            Scenario(
+                "post_detail",
+                reverse("posts:post_detail", kwargs={"post_id": post.pk}),
+            ),
+        ]
+    if reader is None:
+        return reader, scenarios
+    scenarios += [
+        Scenario("follow_index", reverse("posts:follow_index"), login=True),
+        Scenario(
+            "post_create",
+            reverse("posts:post_create"),
+            method="post",
+            data=lambda i: {"text": f"benchmark post {i}"},
+            login=True,
+        ),
+    ]
+    if post is not None:
+        scenarios.append(
+            Scenario(
+                "add_comment",
+                reverse("posts:add_comment", kwargs={"post_id": post.pk}),
+                method="post",
+                data=lambda i: {"text": f"benchmark comment {i}"},
+                login=True,
+            )
+        )
+    if target is not None:
+
+        def unfollowed():
+            Follow.objects.filter(user=reader, author=target).delete()
+
+        def followed():
+            Follow.objects.get_or_create(user=reader, author=target)
+
+        scenarios += [
+            Scenario(
+                "profile_follow",
+                reverse(
+                    "posts:profile_follow",
+                    kwargs={"username": target.username},
+                ),
+                login=True,
+                setup=unfollowed,
+            ),
+            Scenario(
+                "profile_unfollow",
+                reverse(
+                    "posts:profile_unfollow",
+                    kwargs={"username": target.username},
+                ),
+                login=True,
+                setup=followed,
+            ),
+        ]
+    return reader, scenarios
+
+
+def run(iterations, warmup=1, cold_cache=False, only=None):
+    reader, scenarios = build_scenarios()
+    guest = Client()
+    member = Client()
+    if reader is not None:
+        member.force_login(reader)
+    results = []
+    for scenario in scenarios:
+        if only and scenario.name not in only:
+            continue
+        client = member if scenario.login else guest
+        timings, queries, sizes, statuses = [], [], [], []
+        for iteration in range(warmup + iterations):
+            if cold_cache:
+                cache.clear()
+            if scenario.setup:
+                scenario.setup()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = scenario.request(client, iteration)
+                elapsed = time.perf_counter() - started
+            if iteration < warmup:
+                continue
+            timings.append(elapsed)
+            queries.append(len(captured))
+            sizes.append(len(response.content))
+            statuses.append(response.status_code)
+        results.append(
+            summarize(scenario.name, timings, queries, sizes, statuses)
+        )
+    return results
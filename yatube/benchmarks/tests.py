@@ -0,0 +1,74 @@
+from django.test import TestCase, TransactionTestCase
+
+from benchmarks import concurrency, contention, data, runner
+from posts.models import Group, Post, User
+
+
+class BenchmarkTest(TestCase):
+    def test_populate_creates_requested_volume(self):
+        """Генератор создаёт заданное число объектов"""
+        dataset = data.populate(
+            users=20, groups=3, posts=60, comments=40, follows=30
+        )
+        self.assertEqual(dataset["users"], 20)
+        self.assertEqual(dataset["posts"], 60)
+        self.assertEqual(dataset["comments"], 40)
+        self.assertEqual(dataset["follows"], 30)
+
+    def test_run_reports_every_view(self):
+        """Прогон возвращает p50/p95, запросы и размер для каждого вида"""
+        data.populate(users=20, groups=3, posts=60, comments=40, follows=30)
+        results = runner.run(iterations=2, warmup=0)
+        views = {row["view"] for row in results}
+        self.assertTrue(
+            {"index", "post_detail", "follow_index", "post_create"} <= views
+        )
+        for row in results:
+            with self.subTest(view=row["view"]):
+                self.assertLessEqual(row["p50_ms"], row["p95_ms"])
+                self.assertGreater(row["queries_avg"], 0)
+                self.assertTrue(set(row["statuses"]) <= {200, 302})
+
+    def test_sparse_data_skips_missing_scenarios(self):
+        """Без подписок и постов прогон пропускает их сценарии"""
+        data.populate(users=5, groups=1, posts=10, comments=0, follows=0)
+        views = {row["view"] for row in runner.run(iterations=1)}
+        self.assertIn("profile_follow", views)
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        views = {row["view"] for row in runner.run(iterations=1)}
+        self.assertNotIn("post_detail", views)
+        self.assertNotIn("group_posts", views)
+        self.assertIn("follow_index", views)
+        User.objects.all().delete()
+        views = {row["view"] for row in runner.run(iterations=1)}
+        self.assertEqual(views, {"index"})
+
+
+class ConcurrencyBenchmarkTest(TransactionTestCase):
+    def test_concurrent_run_over_http(self):
+        """Параллельный прогон обслуживается WSGI-сервером без ошибок"""
+        data.populate(users=20, groups=3, posts=60, comments=40, follows=30)
+        results = concurrency.run(2, 2, only=["index", "follow_index"])
+        self.assertEqual(
+            [row["view"] for row in results], ["index", "follow_index"]
+        )
+        for row in results:
+            with self.subTest(view=row["view"]):
+                self.assertEqual(row["requests"], 4)
+                self.assertEqual(row["errors"], 0)
+                self.assertGreater(row["rps"], 0)
+
+
+class ContentionBenchmarkTest(TestCase):
+    def test_tuned_profile_has_no_lock_errors(self):
+        """С core.db параллельная запись проходит без ошибок блокировки"""
+        results = {
+            row["profile"]: row
+            for row in contention.run(writers=4, readers=2, transactions=20)
+        }
+        self.assertEqual(set(results), {"default", "pragmas", "tuned"})
+        tuned = results["tuned"]
+        self.assertEqual(tuned["write_errors"], 0)
+        self.assertEqual(tuned["writes"], 4 * 20)
+        self.assertEqual(tuned["reads"], 2 * 20)
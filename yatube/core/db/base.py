@@ -0,0 +1,34 @@
+"""SQLite с настройками для параллельной записи.
+
+Каждое новое соединение получает PRAGMA из SQLITE_PRAGMAS (WAL,
+synchronous=NORMAL, mmap, кэш страниц, busy_timeout, temp_store), а
+транзакции начинаются с BEGIN IMMEDIATE: блокировка записи берётся сразу
+и ждёт busy_timeout, вместо того чтобы упасть с "database is locked" при
+повышении блокировки чтения посреди транзакции.
+
+DATABASES = {"default": {"ENGINE": "core.db", ...}}
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+def apply_pragmas(connection, pragmas):
+    cursor = connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, settings.SQLITE_PRAGMAS)
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        if settings.SQLITE_IMMEDIATE_TRANSACTIONS:
+            self.cursor().execute("BEGIN IMMEDIATE")
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,29 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Копирует основную базу SQLite в файлы реплик из DATABASE_REPLICAS"
+    )
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != "sqlite":
+            raise CommandError("Синхронизация реплик работает только с SQLite")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("DATABASE_REPLICAS пуст")
+        source.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            replica = connections[alias]
+            # Reopened on the next query, after the file is replaced.
+            replica.close()
+            target = sqlite3.connect(replica.settings_dict["NAME"])
+            try:
+                source.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f"{alias}: {replica.settings_dict['NAME']}")
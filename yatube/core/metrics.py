@@ -0,0 +1,182 @@
+"""Метрики запросов: время, SQL, рендеринг шаблонов и попадания в кэш.
+
+MetricsMiddleware открывает RequestMetrics на время запроса, а код ниже
+по стеку дописывает в него через record_*(). Итоги копятся в кэше
+(METRICS_CACHE) — общем для воркеров, если кэш общий.
+"""
+import contextvars
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Верхние границы корзин гистограммы длительности, в секундах.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+VIEWS_KEY = "metrics:views"
+# Integer counters in the cache; seconds are stored as microseconds.
+COUNTERS = (
+    "requests",
+    "duration_us",
+    "sql_queries",
+    "sql_us",
+    "template_us",
+    "cache_hits",
+    "cache_misses",
+)
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.sql_queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+
+def start():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def record_sql(elapsed):
+    metrics = current()
+    if metrics is not None:
+        metrics.sql_queries += 1
+        metrics.sql_time += elapsed
+
+
+def record_template(elapsed):
+    metrics = current()
+    if metrics is not None:
+        metrics.template_time += elapsed
+
+
+def record_cache(hit):
+    metrics = current()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def _store():
+    return caches[settings.METRICS_CACHE]
+
+
+def _key(view, name):
+    return f"metrics:{view}:{name}"
+
+
+def _incr(store, key, delta):
+    try:
+        store.incr(key, delta)
+    except ValueError:
+        if not store.add(key, delta, None):
+            store.incr(key, delta)
+
+
+def observe(view, metrics):
+    store = _store()
+    views = store.get(VIEWS_KEY, set())
+    if view not in views:
+        store.set(VIEWS_KEY, views | {view}, None)
+    values = {
+        "requests": 1,
+        "duration_us": int(metrics.duration * 1e6),
+        "sql_queries": metrics.sql_queries,
+        "sql_us": int(metrics.sql_time * 1e6),
+        "template_us": int(metrics.template_time * 1e6),
+        "cache_hits": metrics.cache_hits,
+        "cache_misses": metrics.cache_misses,
+    }
+    for bound in BUCKETS:
+        if metrics.duration <= bound:
+            # Only the first matching bucket; cumulated on export.
+            values[f"bucket_{bound}"] = 1
+            break
+    for name, delta in values.items():
+        if delta:
+            _incr(store, _key(view, name), delta)
+
+
+def snapshot():
+    """Накопленные счётчики по именам представлений."""
+    store = _store()
+    result = {}
+    for view in sorted(store.get(VIEWS_KEY, set())):
+        names = list(COUNTERS) + [f"bucket_{bound}" for bound in BUCKETS]
+        raw = store.get_many([_key(view, name) for name in names])
+        result[view] = {
+            name: raw.get(_key(view, name), 0) for name in names
+        }
+    return result
+
+
+def render_prometheus():
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    data = snapshot()
+    family(
+        "yatube_request_duration_seconds",
+        "histogram",
+        "Время обработки запроса",
+    )
+    for view, values in data.items():
+        cumulative = 0
+        for bound in BUCKETS:
+            cumulative += values[f"bucket_{bound}"]
+            lines.append(
+                "yatube_request_duration_seconds_bucket"
+                f'{{view="{view}",le="{bound}"}} {cumulative}'
+            )
+        lines.append(
+            "yatube_request_duration_seconds_bucket"
+            f'{{view="{view}",le="+Inf"}} {values["requests"]}'
+        )
+        lines.append(
+            f'yatube_request_duration_seconds_sum{{view="{view}"}} '
+            f'{values["duration_us"] / 1e6}'
+        )
+        lines.append(
+            f'yatube_request_duration_seconds_count{{view="{view}"}} '
+            f'{values["requests"]}'
+        )
+    totals = (
+        ("yatube_sql_queries_total", "sql_queries", 1, "Число SQL-запросов"),
+        ("yatube_sql_seconds_total", "sql_us", 1e6, "Время SQL"),
+        (
+            "yatube_template_seconds_total",
+            "template_us",
+            1e6,
+            "Время рендеринга шаблонов",
+        ),
+        ("yatube_cache_hits_total", "cache_hits", 1, "Попадания в кэш"),
+        ("yatube_cache_misses_total", "cache_misses", 1, "Промахи кэша"),
+    )
+    for metric, counter, scale, help_text in totals:
+        family(metric, "counter", help_text)
+        for view, values in data.items():
+            value = values[counter] / scale if scale != 1 else values[counter]
+            lines.append(f'{metric}{{view="{view}"}} {value}')
+    return "\n".join(lines) + "\n"
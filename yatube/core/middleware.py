@@ -0,0 +1,97 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, routers
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+def _timed_execute(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_sql(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """Собирает метрики по имени представления.
+
+    При METRICS_HEADERS добавляет к ответу X-Query-Count и Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics, token = metrics.start()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(_timed_execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.stop(token)
+        request_metrics.finish()
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+        metrics.observe(view, request_metrics)
+        if settings.METRICS_HEADERS:
+            response["X-Query-Count"] = str(request_metrics.sql_queries)
+            response["Server-Timing"] = ", ".join(
+                f"{name};dur={seconds * 1000:.1f}"
+                for name, seconds in (
+                    ("total", request_metrics.duration),
+                    ("sql", request_metrics.sql_time),
+                    ("tpl", request_metrics.template_time),
+                )
+            )
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Читает из основной базы там, где нужна согласованность.
+
+    Запрос с небезопасным методом, к представлению с use_primary или от
+    клиента с cookie REPLICA_PIN_COOKIE целиком идёт в default; прочие
+    читают с реплик. Cookie на REPLICA_PIN_SECONDS ставят небезопасные
+    методы и GET, который действительно записал в базу: GET формы поста
+    её не ставит, GET подписки — ставит. Стоит до SessionMiddleware,
+    чтобы сессия читалась так же.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        unsafe = request.method not in SAFE_METHODS
+        pinned = unsafe or settings.REPLICA_PIN_COOKIE in request.COOKIES
+        token = routers.pin() if pinned else routers.allow_replicas()
+        try:
+            with routers.track_writes() as written:
+                response = self.get_response(request)
+        finally:
+            # The process_view pin was set last and is reset first.
+            view_token = getattr(request, "_pin_token", None)
+            if view_token is not None:
+                routers.unpin(view_token)
+            routers.unpin(token)
+        if (unsafe or written) and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, "use_primary", False):
+            if not routers.is_pinned():
+                request._pin_token = routers.pin()
@@ -0,0 +1,85 @@
+"""Чтение с реплик, запись в основную базу.
+
+PrimaryReplicaRouter отправляет чтение на случайную реплику из
+DATABASE_REPLICAS только внутри allow_replicas(): так делает
+ReplicaPinningMiddleware для читающих запросов. Всё остальное —
+команды manage.py, задачи очереди, shell — читает из default, как и
+код под primary(). Запрос, который записал в базу, ставит клиенту
+cookie, и на REPLICA_PIN_SECONDS его следующие запросы тоже читают из
+default: пока реплики догоняют, он видит свои изменения.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_replica_reads = contextvars.ContextVar("db_replica_reads", default=False)
+_written = contextvars.ContextVar("db_written", default=None)
+
+
+def is_pinned():
+    return not _replica_reads.get()
+
+
+def pin():
+    return _replica_reads.set(False)
+
+
+def allow_replicas():
+    return _replica_reads.set(True)
+
+
+def unpin(token):
+    """Возвращает состояние до pin() или allow_replicas()."""
+    _replica_reads.reset(token)
+
+
+@contextmanager
+def primary():
+    """Все запросы внутри блока читают из default."""
+    token = pin()
+    try:
+        yield
+    finally:
+        unpin(token)
+
+
+@contextmanager
+def track_writes():
+    """Множество моделей, для которых внутри блока выбиралась база записи."""
+    written = set()
+    token = _written.set(written)
+    try:
+        yield written
+    finally:
+        _written.reset(token)
+
+
+def use_primary(view):
+    """Помечает представление, которому нужно читать из default:
+    оно пишет, в том числе на GET."""
+    view.use_primary = True
+    return view
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and not is_pinned():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        written = _written.get()
+        if written is not None:
+            written.add(model._meta.label)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default: объекты из любых баз связаны.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема попадает на реплики вместе с данными.
+        return db == DEFAULT_DB_ALIAS
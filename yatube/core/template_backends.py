@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models.query import QuerySet
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils.functional import LazyObject, empty
+
+from . import metrics
+
+
+class UnboundedQuerysetError(ImproperlyConfigured):
+    pass
+
+
+def audit_context(context, template_name):
+    """Запрещает класть в контекст QuerySet без LIMIT.
+
+    Шаблон или debug toolbar, обратившись к такому значению, прочтёт всю
+    таблицу; в контекст идут страница и посчитанные числа.
+    """
+    for key, value in context.items():
+        if isinstance(value, LazyObject):
+            # Checking an unevaluated lazy value would evaluate it.
+            if value._wrapped is empty:
+                continue
+            value = value._wrapped
+        if isinstance(value, QuerySet) and value.query.high_mark is None:
+            raise UnboundedQuerysetError(
+                f"{template_name}: в контексте {key!r} — QuerySet без "
+                f"ограничения ({value.model.__name__})"
+            )
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        if context and settings.TEMPLATE_CONTEXT_AUDIT:
+            audit_context(context, self.origin.template_name)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.record_template(time.perf_counter() - started)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates, учитывающий время рендеринга в метриках запроса."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+@contextmanager
+def run_on_commit(using=DEFAULT_DB_ALIAS):
+    """Выполняет колбэки on_commit, накопленные внутри блока.
+
+    TestCase не коммитит, и без этого они не запускаются никогда
+    (аналог captureOnCommitCallbacks(execute=True) из Django 3.2).
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    try:
+        yield
+    finally:
+        callbacks = connection.run_on_commit[start:]
+        del connection.run_on_commit[start:]
+        for _, func in callbacks:
+            func()
+
+
+class AuditingTestRunner(DiscoverRunner):
+    """Тесты рендерят шаблоны с проверкой контекста (core.template_backends).
+
+    Представление, передавшее в шаблон QuerySet без LIMIT, падает с
+    UnboundedQuerysetError.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.audit = override_settings(TEMPLATE_CONTEXT_AUDIT=True)
+        self.audit.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.audit.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,210 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.template import engines
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from core import metrics, routers
+from core.template_backends import UnboundedQuerysetError
+from posts import counters
+from posts.models import Follow, Post
+from taskqueue import queue
+
+User = get_user_model()
+
+counted = []
+
+
+@queue.task
+def count_posts():
+    counted.append(Post.objects.count())
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    @override_settings(METRICS_HEADERS=True)
+    def test_headers_report_queries_and_timing(self):
+        """Ответ содержит X-Query-Count и Server-Timing"""
+        response = self.guest_client.get(reverse("posts:index"))
+        self.assertGreater(int(response["X-Query-Count"]), 0)
+        self.assertRegex(
+            response["Server-Timing"],
+            r"^total;dur=[\d.]+, sql;dur=[\d.]+, tpl;dur=[\d.]+$",
+        )
+
+    @override_settings(METRICS_HEADERS=False)
+    def test_headers_are_optional(self):
+        """Без METRICS_HEADERS заголовков нет"""
+        response = self.guest_client.get(reverse("posts:index"))
+        self.assertFalse(response.has_header("X-Query-Count"))
+
+    def test_metrics_are_aggregated_by_view(self):
+        """Метрики копятся по имени представления"""
+        self.guest_client.get(reverse("posts:index"))
+        self.guest_client.get(reverse("posts:index"))
+        stats = metrics.snapshot()["posts:index"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertGreater(stats["sql_queries"], 0)
+        self.assertGreater(stats["template_us"], 0)
+        self.assertEqual(stats["cache_misses"], 1)
+        self.assertEqual(stats["cache_hits"], 1)
+
+    def test_metrics_endpoint(self):
+        """/metrics отдаёт метрики в формате Prometheus"""
+        self.guest_client.get(reverse("posts:index"))
+        response = self.guest_client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket{view="posts:index",'
+            'le="+Inf"} 1',
+            body,
+        )
+        self.assertIn('yatube_sql_queries_total{view="posts:index"}', body)
+
+    def test_metrics_endpoint_is_internal(self):
+        """/metrics закрыт для внешних адресов"""
+        response = self.guest_client.get(
+            reverse("metrics"), REMOTE_ADDR="10.0.0.1"
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(TEMPLATE_CONTEXT_AUDIT=True)
+class ContextAuditTest(TestCase):
+    def setUp(self):
+        self.template = engines.all()[0].from_string("{{ posts|length }}")
+
+    def test_unbounded_queryset_fails(self):
+        """QuerySet без LIMIT в контексте роняет рендеринг"""
+        with self.assertRaises(UnboundedQuerysetError):
+            self.template.render({"posts": Post.objects.all()})
+
+    def test_sliced_queryset_passes(self):
+        """Срез QuerySet в контексте допустим"""
+        self.assertEqual(
+            self.template.render({"posts": Post.objects.all()[:10]}), "0"
+        )
+
+
+class SqliteTuningTest(TestCase):
+    def test_pragmas_applied_to_connections(self):
+        """Соединение получает PRAGMA из SQLITE_PRAGMAS"""
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute("PRAGMA synchronous")
+            # NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute("PRAGMA temp_store")
+            # MEMORY
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTest(TransactionTestCase):
+    """Реплика — второй файл SQLite, его обновляет sync_replicas."""
+
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        connections.databases["replica"] = {
+            "ENGINE": "core.db",
+            "NAME": os.path.join(cls.directory, "replica.sqlite3"),
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["replica"].close()
+        del connections.databases["replica"]
+        delattr(connections._connections, "replica")
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="auth")
+        self.author = User.objects.create_user(username="author")
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.sync()
+
+    def sync(self):
+        call_command("sync_replicas", stdout=StringIO())
+
+    def test_reads_go_to_replica(self):
+        """Читающий запрос идёт на реплику, код вне запроса — в default"""
+        Post.objects.create(author=self.author, text="test-text")
+        self.assertEqual(Post.objects.count(), 1)
+        url = reverse("posts:index")
+        self.assertNotContains(Client().get(url), "test-text")
+        self.sync()
+        cache.clear()
+        self.assertContains(Client().get(url), "test-text")
+
+    def test_commands_and_tasks_read_primary(self):
+        """Команды и задачи очереди не читают отстающую реплику"""
+        Post.objects.bulk_create([Post(author=self.author, text="test")])
+        call_command("reconcile_counters", stdout=StringIO())
+        self.assertEqual(counters.user_stats(self.author).posts_count, 1)
+        counted.clear()
+        token = routers.allow_replicas()
+        try:
+            self.assertEqual(Post.objects.count(), 0)
+            queue.execute(count_posts.delay())
+            with override_settings(TASKS_ALWAYS_EAGER=True):
+                count_posts.delay()
+        finally:
+            routers.unpin(token)
+        self.assertEqual(counted, [1, 1])
+
+    def test_writer_reads_own_writes(self):
+        """После записи клиент читает из default, остальные — с реплики"""
+        response = self.authorized_client.post(
+            reverse("posts:post_create"), {"text": "test-new-post"}
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        url = reverse("posts:profile", kwargs={"username": "auth"})
+        self.assertContains(self.authorized_client.get(url), "test-new-post")
+        cache.clear()
+        self.assertNotContains(Client().get(url), "test-new-post")
+
+    def test_write_on_get_pins_client(self):
+        """Подписка GET-запросом тоже закрепляет клиента за default"""
+        response = self.authorized_client.get(
+            reverse("posts:profile_follow", kwargs={"username": "author"})
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
+
+    def test_get_of_write_view_does_not_pin(self):
+        """GET формы поста читает из default, но cookie не ставит"""
+        response = self.authorized_client.get(reverse("posts:post_create"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_reads_do_not_pin(self):
+        """Чтение не ставит cookie закрепления"""
+        response = self.authorized_client.get(reverse("posts:index"))
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
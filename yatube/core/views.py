@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from . import metrics
+
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию,
@@ -17,3 +21,16 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=""):
     return render(request, "core/403csrf.html")
+
+
+def metrics_view(request):
+    # Только для сборщика метрик из INTERNAL_IPS и для персонала.
+    if (
+        request.META.get("REMOTE_ADDR") not in settings.INTERNAL_IPS
+        and not request.user.is_staff
+    ):
+        raise Http404
+    return HttpResponse(
+        metrics.render_prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
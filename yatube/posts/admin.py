@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.contrib import admin
 
+from . import search
 from .models import Post, Group, Comment, Follow
 
 
@@ -16,6 +18,15 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        # Полнотекстовый индекс вместо LIKE '%...%' по всей таблице
+        if not search_term:
+            return queryset, False
+        hits = search.get_engine().search(
+            search_term, settings.POSTS_ADMIN_SEARCH_LIMIT
+        )
+        return queryset.filter(pk__in=[hit.post_id for hit in hits]), False
+
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = (
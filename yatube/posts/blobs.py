@@ -0,0 +1,55 @@
+"""Ссылки постов на файлы картинок.
+
+ContentAddressedStorage сводит одинаковые загрузки к одному файлу, а
+ImageBlob считает, сколько постов на него ссылается. Когда ссылок не
+остаётся, файл удаляется вместе с миниатюрами и вариантами.
+"""
+import json
+import logging
+
+from django.core.exceptions import SuspiciousOperation
+from django.core.files.storage import default_storage
+from django.db.models import F
+from sorl import thumbnail
+from sorl.thumbnail.images import ImageFile
+from taskqueue import queue
+
+from .models import ImageBlob, Post
+from .thumbnails import image_storage
+
+logger = logging.getLogger(__name__)
+
+
+def acquire(name):
+    """Добавляет ссылку на файл name."""
+    if ImageBlob.objects.filter(pk=name).update(refs=F("refs") + 1):
+        return
+    _, created = ImageBlob.objects.get_or_create(pk=name, defaults={"refs": 1})
+    if not created:
+        ImageBlob.objects.filter(pk=name).update(refs=F("refs") + 1)
+
+
+def release(name):
+    """Снимает ссылку на файл name; последняя удаляет файл."""
+    ImageBlob.objects.filter(pk=name, refs__gt=0).update(refs=F("refs") - 1)
+    blob = ImageBlob.objects.filter(pk=name, refs=0).first()
+    if blob is not None:
+        blob.delete()
+        queue.enqueue("posts.tasks.delete_image_files", name, blob.variants)
+
+
+def delete_files(name, variants):
+    # A new upload of the same content may have claimed the file since.
+    if (
+        ImageBlob.objects.filter(pk=name).exists()
+        or Post.objects.filter(image=name).exists()
+    ):
+        return
+    try:
+        if variants:
+            for variant in json.loads(variants)["variants"]:
+                default_storage.delete(variant["name"])
+        thumbnail.delete(ImageFile(name, image_storage()))
+    except (OSError, SuspiciousOperation):
+        # Nothing to retry: the file is orphaned either way.
+        logger.exception("Не удалось удалить картинку %s", name)
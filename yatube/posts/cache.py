@@ -0,0 +1,107 @@
+"""Поколение кэша лент: любая запись постов, комментариев и групп
+увеличивает версию, и фрагменты со старой версией в ключе больше не
+читаются. Поэтому фрагменты можно хранить долго, без фиксированного TTL.
+
+get_or_compute защищает дорогие фрагменты от одновременного пересчёта:
+запись обновляется заранее с вероятностью, растущей к концу срока
+(XFetch), а пока один воркер держит блокировку, остальные отдают
+устаревшее значение. Версия передаётся отдельно от ключа и хранится
+рядом со значением: после записи старое значение тоже считается
+устаревшим, а не пропадает, и отдаётся на время пересчёта.
+"""
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import metrics
+
+VERSION_KEY = "posts:feed_version"
+
+
+def _initial_version():
+    # A restarted or evicted counter must never reuse an old version.
+    return time.time_ns() // 1000
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        version = _initial_version()
+        cache.set(VERSION_KEY, version, None)
+        return version
+
+
+# XFetch: > 1 refreshes earlier, < 1 closer to the deadline.
+XFETCH_BETA = 1.0
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _is_fresh(expires_at, delta):
+    jitter = -delta * XFETCH_BETA * math.log(1.0 - random.random())
+    return time.time() + jitter < expires_at
+
+
+def _wait_for(fragment_cache, key):
+    deadline = time.time() + settings.FEED_CACHE_LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = fragment_cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_compute(key, compute, timeout, fragment_cache=cache, version=None):
+    """Значение из кэша или compute(), пересчитываемое одним воркером.
+
+    key не должен включать version: значение другой версии считается
+    истёкшим и отдаётся, пока блокировку держит другой воркер. version
+    читается до compute() и сохраняется вместе со значением, так что
+    запись во время пересчёта снова сделает его устаревшим.
+    """
+    entry = fragment_cache.get(key)
+    if entry is not None:
+        value, expires_at, delta, entry_version = entry
+        if entry_version == version and _is_fresh(expires_at, delta):
+            metrics.record_cache(hit=True)
+            return value
+    metrics.record_cache(hit=False)
+    lock_key = key + ":lock"
+    locked = fragment_cache.add(
+        lock_key, 1, settings.FEED_CACHE_LOCK_TIMEOUT
+    )
+    if not locked:
+        if entry is None:
+            entry = _wait_for(fragment_cache, key)
+        if entry is not None:
+            return entry[0]
+    try:
+        started = time.time()
+        value = compute()
+        finished = time.time()
+        if timeout is None:
+            expires_at, hard_timeout = math.inf, None
+        else:
+            expires_at = finished + timeout
+            hard_timeout = timeout + settings.FEED_CACHE_STALE_TIMEOUT
+        fragment_cache.set(
+            key,
+            (value, expires_at, finished - started, version),
+            hard_timeout,
+        )
+    finally:
+        if locked:
+            fragment_cache.delete(lock_key)
+    return value
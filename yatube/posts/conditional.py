@@ -0,0 +1,44 @@
+"""ETag для условных GET.
+
+Считается до рендеринга: версия кэша лент, самые свежие pub_date/created
+в ленте страницы и состояние зрителя. Совпадение отдаёт 304 без шаблона.
+Last-Modified не отдаётся: дата не различает зрителей и параметры
+запроса, и клиент с одним If-Modified-Since получил бы чужую страницу.
+"""
+import hashlib
+
+from django.db.models import Max
+
+from . import cache, profiles
+from .models import Comment, Post
+
+
+def _etag(request, *parts):
+    parts += (
+        cache.get_version(),
+        request.user.pk,
+        request.GET.urlencode(),
+    )
+    return hashlib.md5(":".join(map(str, parts)).encode()).hexdigest()
+
+
+def _newest(queryset, field):
+    return queryset.order_by().aggregate(newest=Max(field))["newest"]
+
+
+def group_posts_etag(request, slug):
+    newest = _newest(Post.objects.filter(group__slug=slug), "pub_date")
+    return _etag(request, "group", slug, newest)
+
+
+def profile_etag(request, username):
+    profile = profiles.get_header(username)
+    if profile is None:
+        return None
+    following = profiles.is_following(request.user, profile["id"])
+    return _etag(request, "profile", username, profile["version"], following)
+
+
+def post_detail_etag(request, post_id):
+    newest = _newest(Comment.objects.filter(post=post_id), "created")
+    return _etag(request, "post", post_id, newest)
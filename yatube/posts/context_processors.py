@@ -0,0 +1,15 @@
+from django.conf import settings
+
+from . import cache
+
+
+def feed_cache(request):
+    """Версия и время жизни кэшированных фрагментов лент."""
+    return {
+        # A callable, not a lazy object: the template calls it when
+        # {% stale_cache %} starts rendering and the fragment is stored
+        # under that value. A lazy object would be read only when the
+        # entry is pickled, after a write during rendering could bump it.
+        "feed_cache_version": cache.get_version,
+        "feed_cache_timeout": settings.FEED_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,134 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарно через F() из сигналов записи, а расхождения
+после bulk-операций исправляет команда reconcile_counters.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, ImageBlob, Post, User, UserStats
+
+
+def _count_by(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+# (model, counter field, source model, source foreign key)
+COUNTERS = (
+    (Group, "posts_count", Post, "group"),
+    (Post, "comments_count", Comment, "post"),
+    (UserStats, "posts_count", Post, "author"),
+    (UserStats, "followers_count", Follow, "author"),
+    (UserStats, "following_count", Follow, "user"),
+    (ImageBlob, "refs", Post, "image"),
+)
+
+
+def _bump(queryset, field, delta):
+    if delta < 0:
+        # Rows written by bulk operations may already be at zero.
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def bump(model, pk, field, delta):
+    if pk is not None:
+        _bump(model.objects.filter(pk=pk), field, delta)
+
+
+def bump_user(user_id, field, delta):
+    stats = UserStats.objects.filter(pk=user_id)
+    if not _bump(stats, field, delta) and delta > 0 and not stats.exists():
+        # First write for this user: count from the source tables once.
+        # Removals skip this: the user may be mid-cascade delete.
+        user_stats(User(pk=user_id))
+
+
+def user_stats(user):
+    """Счётчики пользователя; недостающая строка считается на лету."""
+    try:
+        return UserStats.objects.get(pk=user.pk)
+    except UserStats.DoesNotExist:
+        stats, _ = UserStats.objects.get_or_create(
+            pk=user.pk,
+            defaults={
+                "posts_count": Post.objects.filter(author=user.pk).count(),
+                "followers_count": Follow.objects.filter(
+                    author=user.pk
+                ).count(),
+                "following_count": Follow.objects.filter(
+                    user=user.pk
+                ).count(),
+            },
+        )
+        return stats
+
+
+def post_added(post):
+    bump_user(post.author_id, "posts_count", 1)
+    bump(Group, post.group_id, "posts_count", 1)
+
+
+def post_removed(post):
+    bump_user(post.author_id, "posts_count", -1)
+    bump(Group, post.group_id, "posts_count", -1)
+
+
+def post_moved(old_group_id, new_group_id):
+    if old_group_id != new_group_id:
+        bump(Group, old_group_id, "posts_count", -1)
+        bump(Group, new_group_id, "posts_count", 1)
+
+
+def comment_added(comment):
+    bump(Post, comment.post_id, "comments_count", 1)
+
+
+def comment_removed(comment):
+    bump(Post, comment.post_id, "comments_count", -1)
+
+
+def follow_added(follow):
+    bump_user(follow.author_id, "followers_count", 1)
+    bump_user(follow.user_id, "following_count", 1)
+
+
+def follow_removed(follow):
+    bump_user(follow.author_id, "followers_count", -1)
+    bump_user(follow.user_id, "following_count", -1)
+
+
+def reconcile():
+    """Пересчитывает все счётчики; возвращает число исправленных строк."""
+    UserStats.objects.bulk_create(
+        [UserStats(pk=pk) for pk in User.objects.values_list("pk", flat=True)],
+        ignore_conflicts=True,
+    )
+    ImageBlob.objects.bulk_create(
+        [
+            ImageBlob(name=name)
+            for name in Post.objects.exclude(image="")
+            .order_by()
+            .values_list("image", flat=True)
+            .distinct()
+        ],
+        ignore_conflicts=True,
+    )
+    fixed = {}
+    for model, field, source, key in COUNTERS:
+        actual = _count_by(source, key)
+        fixed[f"{model.__name__}.{field}"] = (
+            model.objects.annotate(actual=actual)
+            .exclude(**{field: F("actual")})
+            .update(**{field: actual})
+        )
+    return fixed
@@ -0,0 +1,114 @@
+"""Граф подписок в кэше.
+
+Для каждого пользователя хранятся отсортированные массивы id: на кого он
+подписан и кто подписан на него. Проверка подписки — бинарный поиск,
+O(log n); число подписчиков — длина массива; взаимные подписки —
+слияние двух отсортированных массивов. Сигналы Follow сбрасывают оба
+массива после коммита; следующее чтение перечитывает их из Follow.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+# Signed 64-bit: wide enough for any primary key.
+TYPECODE = "q"
+
+
+def _following_key(user_id):
+    return f"follow_graph:following:{user_id}"
+
+
+def _followers_key(author_id):
+    return f"follow_graph:followers:{author_id}"
+
+
+def _load(key, **lookup):
+    ids = cache.get(key)
+    if ids is None:
+        column = "author_id" if "user" in lookup else "user_id"
+        ids = array(
+            TYPECODE,
+            Follow.objects.filter(**lookup)
+            .order_by(column)
+            .values_list(column, flat=True),
+        )
+        cache.set(key, ids, settings.FOLLOW_GRAPH_TIMEOUT)
+    return ids
+
+
+def following(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    return _load(_following_key(user_id), user=user_id)
+
+
+def followers(author_id):
+    """Отсортированный массив id подписчиков author_id."""
+    return _load(_followers_key(author_id), author=author_id)
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def is_following(user_id, author_ids):
+    """{author_id: подписан ли user_id} для всех author_ids сразу."""
+    ids = following(user_id)
+    return {author_id: _contains(ids, author_id) for author_id in author_ids}
+
+
+def follows(user_id, author_id):
+    return _contains(following(user_id), author_id)
+
+
+def follower_count(author_id):
+    return len(followers(author_id))
+
+
+def is_mutual(user_id, other_id):
+    return follows(user_id, other_id) and follows(other_id, user_id)
+
+
+def mutuals(user_id):
+    """id пользователей, с которыми user_id подписан взаимно."""
+    left, right = following(user_id), followers(user_id)
+    result = array(TYPECODE)
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if left[i] == right[j]:
+            result.append(left[i])
+            i += 1
+            j += 1
+        elif left[i] < right[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def _invalidate(follow):
+    keys = [_following_key(follow.user_id), _followers_key(follow.author_id)]
+    # Drop rather than edit: a read-modify-write here races with other
+    # writers and with readers that loaded the pre-commit rows.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def follow_added(follow):
+    _invalidate(follow)
+
+
+def follow_removed(follow):
+    _invalidate(follow)
+
+
+def forget(*user_ids):
+    """Сбрасывает массивы после записей в обход сигналов (bulk_create)."""
+    cache.delete_many(
+        [_following_key(pk) for pk in user_ids]
+        + [_followers_key(pk) for pk in user_ids]
+    )
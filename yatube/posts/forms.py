@@ -1,6 +1,7 @@
 from django import forms
 
 from .models import Comment, Post
+from .uploads import validate_image_upload
 
 
 class PostForm(forms.ModelForm):
@@ -17,6 +18,27 @@ class PostForm(forms.ModelForm):
             "image": "pickup the picture",
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # ImageField reads the whole file into Pillow, so size, format and
+        # dimensions are checked first; a rejected file never reaches it.
+        self.image_error = None
+        name = self.add_prefix("image")
+        image = self.files.get(name)
+        if image:
+            try:
+                validate_image_upload(image)
+            except forms.ValidationError as error:
+                self.image_error = error
+                self.files = self.files.copy()
+                del self.files[name]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.image_error is not None:
+            self.add_error("image", self.image_error)
+        return cleaned_data
+
     def clean_text(self):
         data = self.cleaned_data["text"]
         if not data:
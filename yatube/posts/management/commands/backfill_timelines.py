@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = "Перестраивает материализованные ленты подписок"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="id пользователя; по умолчанию все",
+        )
+
+    def handle(self, *args, **options):
+        created = timeline.backfill(options["user_ids"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Записей в лентах: {created}")
+        )
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает рекомендации «Кого почитать» по графу подписок"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.RECOMMENDATIONS_BATCH_SIZE,
+            help="пользователей в одной транзакции",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=settings.RECOMMENDATIONS_TOP,
+            help="авторов на пользователя",
+        )
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="id пользователя; по умолчанию все",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        users, rows = recommendations.build(
+            options["batch_size"], options["top"], options["user_ids"]
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Пользователей: {users}, рекомендаций: {rows}, "
+                f"{elapsed:.1f} с"
+            )
+        )
@@ -0,0 +1,47 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def build(name, force=False):
+    thumbnails.generate(name, force)
+    return name
+
+
+class Command(BaseCommand):
+    help = "Строит миниатюры из POST_THUMBNAILS для картинок всех постов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="число процессов; по умолчанию по числу CPU",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="перестроить и уже обработанные картинки",
+        )
+
+    def handle(self, *args, **options):
+        names = list(
+            Post.objects.exclude(image="")
+            .order_by()
+            .values_list("image", flat=True)
+            .distinct()
+        )
+        task = partial(build, force=options["force"])
+        if options["workers"] == 0:
+            done = len([task(name) for name in names])
+        else:
+            # Forked workers must not share the parent's connection.
+            connections.close_all()
+            with ProcessPoolExecutor(options["workers"]) as pool:
+                done = len(list(pool.map(task, names, chunksize=8)))
+        self.stdout.write(self.style.SUCCESS(f"Картинок: {done}"))
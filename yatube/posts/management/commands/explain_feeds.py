@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from posts import views
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+def is_table_scan(detail):
+    # "SCAN posts_post" is a scan; "SCAN ... USING INDEX" and FTS5
+    # "VIRTUAL TABLE" reads are not.
+    return (
+        detail.startswith("SCAN")
+        and "USING" not in detail
+        and "VIRTUAL TABLE" not in detail
+    )
+
+
+def is_sort(detail):
+    # "USE TEMP B-TREE FOR ORDER BY": rows are sorted instead of being
+    # read in index order.
+    return "TEMP B-TREE" in detail
+
+
+def is_flagged(detail):
+    return is_table_scan(detail) or is_sort(detail)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет EXPLAIN QUERY PLAN для запросов лент и ищет full scan "
+        "и сортировки во временном B-дереве"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fail-on-scan",
+            action="store_true",
+            help="завершиться с ошибкой, если найден full scan или сортировка",
+        )
+
+    def get_calls(self):
+        post = Post.objects.order_by("-pk").first()
+        group = Group.objects.first()
+        follower = User.objects.filter(follower__isnull=False).first()
+        calls = [("index", views.index, {}, None)]
+        if group is not None:
+            calls.append(
+                ("group_posts", views.group_posts, {"slug": group.slug}, None)
+            )
+        if post is not None:
+            calls += [
+                (
+                    "profile",
+                    views.profile,
+                    {"username": post.author.username},
+                    None,
+                ),
+                ("post_detail", views.post_detail, {"post_id": post.pk}, None),
+            ]
+        if follower is not None:
+            calls.append(("follow_index", views.follow_index, {}, follower))
+        return calls
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def plans(self):
+        """(имя представления, [(sql, план), ...]) для каждой ленты."""
+        factory = RequestFactory()
+        for name, view, kwargs, user in self.get_calls():
+            request = factory.get("/")
+            request.user = user or AnonymousUser()
+            with CaptureQueriesContext(connection) as queries:
+                view(request, **kwargs)
+            yield name, [
+                (query["sql"], self.explain(query["sql"]))
+                for query in queries
+            ]
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("EXPLAIN QUERY PLAN поддерживается для SQLite")
+        scans = 0
+        for name, queries in self.plans():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for sql, plan in queries:
+                flagged = [line for line in plan if is_flagged(line)]
+                scans += len(flagged)
+                style = self.style.WARNING if flagged else str
+                self.stdout.write(style("  " + sql[:120]))
+                for line in plan:
+                    mark = "!!" if line in flagged else "  "
+                    self.stdout.write(f"    {mark} {line}")
+        if scans and options["fail_on_scan"]:
+            raise CommandError(f"Найдено full scan и сортировок: {scans}")
+        self.stdout.write(f"Full scan и сортировок: {scans}")
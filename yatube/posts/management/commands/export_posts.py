@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает пользователей, группы, посты, комментарии и подписки "
+        "в NDJSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default="-", help="файл; по умолчанию stdout"
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="сжать gzip (включается сам для имён *.gz)",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        compress = options["gzip"] or path.endswith(".gz")
+        started = time.perf_counter()
+        stream = transfer.open_output(path, compress)
+        try:
+            written = transfer.export(stream)
+        finally:
+            if path != "-" or compress:
+                stream.close()
+        elapsed = time.perf_counter() - started
+        total = sum(written.values())
+        # The data itself may be going to stdout.
+        report = self.stderr if path == "-" else self.stdout
+        for model in transfer.MODELS:
+            report.write(f"{model}: {written[model]}")
+        report.write(
+            f"Записей: {total} за {elapsed:.1f} с "
+            f"({total / max(elapsed, 1e-9):.0f}/с)"
+        )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = "Загружает NDJSON из export_posts (gzip определяется сам)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default="-", help="файл; по умолчанию stdin"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="записей в одном bulk_create и одной транзакции",
+        )
+
+    def handle(self, *args, **options):
+        importer = transfer.Importer(options["batch_size"])
+        stream = transfer.open_input(options["path"])
+        try:
+            importer.run(stream)
+        except ValueError as error:
+            raise CommandError(error)
+        finally:
+            if options["path"] != "-":
+                stream.close()
+        for model in transfer.MODELS:
+            line = f"{model}: {importer.created[model]}"
+            if importer.skipped[model]:
+                line += f" (пропущено {importer.skipped[model]})"
+            self.stdout.write(line)
+        if importer.duplicates:
+            self.stdout.write(
+                "Повторы в файле: "
+                + ", ".join(sorted(importer.duplicates))
+            )
+        total = sum(importer.created.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано: {total} за {importer.elapsed:.1f} с "
+                f"({total / max(importer.elapsed, 1e-9):.0f}/с)"
+            )
+        )
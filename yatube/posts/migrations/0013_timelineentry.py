@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+
+def fill_timelines(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    db = schema_editor.connection.alias
+    # One row per (follower, post of a followed author), read as a join.
+    rows = (
+        Post.objects.using(db)
+        .filter(author__following__isnull=False)
+        .values_list('author__following__user_id', 'pk')
+        .order_by()
+        .iterator()
+    )
+    batch = []
+    for user_id, post_id in rows:
+        batch.append(TimelineEntry(user_id=user_id, post_id=post_id))
+        if len(batch) == BATCH_SIZE:
+            TimelineEntry.objects.using(db).bulk_create(batch)
+            batch = []
+    TimelineEntry.objects.using(db).bulk_create(batch)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0012_auto_20220128_2147'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post', verbose_name='пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='читатель')),
+            ],
+            options={
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
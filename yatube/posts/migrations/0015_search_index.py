@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE posts_search USING fts5('
+        'post_id UNINDEXED, body)'
+    )
+    schema_editor.execute(
+        'INSERT INTO posts_search (rowid, post_id, body) '
+        'SELECT 2 * id, id, text FROM posts_post'
+    )
+    schema_editor.execute(
+        'INSERT INTO posts_search (rowid, post_id, body) '
+        'SELECT 2 * id + 1, post_id, text FROM posts_comment '
+        'WHERE post_id IS NOT NULL'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
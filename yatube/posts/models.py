@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -8,6 +10,9 @@ class Group(models.Model):
     title = models.CharField("имя", max_length=200)
     slug = models.SlugField("адрес", unique=True)
     description = models.TextField("описание")
+    posts_count = models.PositiveIntegerField(
+        "число постов", default=0, editable=False
+    )
 
     class Meta:
         verbose_name = "Groups, it will be shown in admin panel"
@@ -16,6 +21,27 @@ class Group(models.Model):
         return self.title
 
 
+# Поля поста, которые выводят ленты.
+FEED_FIELDS = (
+    "text",
+    "pub_date",
+    "image",
+    "image_variants",
+    "comments_count",
+    "author__username",
+    "author__first_name",
+    "author__last_name",
+    "group__title",
+    "group__slug",
+)
+
+
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Посты для лент: автор и группа одним запросом, без лишних полей."""
+        return self.select_related("author", "group").only(*FEED_FIELDS)
+
+
 class Post(models.Model):
     text = models.TextField("заголовок")
     pub_date = models.DateTimeField("дата публикации", auto_now_add=True)
@@ -33,19 +59,57 @@ class Post(models.Model):
         related_name="posts",
         verbose_name="автор",
     )
-    image = models.ImageField("Картинка", upload_to="posts/", blank=True)
+    image = models.ImageField(
+        "Картинка",
+        upload_to="posts/",
+        blank=True,
+        storage=ContentAddressedStorage(),
+    )
+    # JSON from posts.thumbnails.build_variants(): widths and formats.
+    image_variants = models.TextField(
+        "варианты картинки", blank=True, default="", editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        "число комментариев", default=0, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Posts, it will be shown in admin panel"
+        # Same order as CursorPaginator, so both pagination modes read
+        # the indexes below in order instead of sorting.
         ordering = (
+            "pub_date",
             "pk",
-            "-pub_date",
         )
+        indexes = [
+            models.Index(
+                fields=["author", "pub_date", "id"],
+                name="post_author_date_idx",
+            ),
+            models.Index(
+                fields=["group", "pub_date", "id"], name="post_group_date_idx"
+            ),
+            models.Index(fields=["pub_date", "id"], name="post_date_idx"),
+        ]
 
     def __str__(self):
         return self.text
 
 
+class ImageBlob(models.Model):
+    """Файл картинки и число постов, которые на него ссылаются."""
+
+    name = models.CharField("файл", max_length=100, primary_key=True)
+    refs = models.PositiveIntegerField("число постов", default=0)
+    # Same JSON as Post.image_variants, built once per file.
+    variants = models.TextField("варианты", blank=True, default="")
+
+    def __str__(self):
+        return self.name
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -66,6 +130,11 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ("created",)
+        indexes = [
+            models.Index(
+                fields=["post", "created"], name="comment_post_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -87,9 +156,87 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ("user", "author")
+        indexes = [
+            # Followers of an author without touching the table (fan-out).
+            models.Index(
+                fields=["author", "user"], name="follow_author_user_idx"
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 name="prevent_self_following",
                 fields=["user", "author"],
             ),
         ]
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок (fan-out on write)."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+        verbose_name="читатель",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+        verbose_name="пост",
+    )
+    # Copy of post.pub_date: the feed is read and ordered by this table's
+    # index alone, without sorting the joined posts.
+    pub_date = models.DateTimeField("дата публикации")
+
+    class Meta:
+        unique_together = ("user", "post")
+        indexes = [
+            models.Index(
+                fields=["user", "pub_date", "post"],
+                name="timeline_user_date_idx",
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя."""
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="stats",
+        verbose_name="пользователь",
+    )
+    posts_count = models.PositiveIntegerField("число постов", default=0)
+    followers_count = models.PositiveIntegerField(
+        "число подписчиков", default=0
+    )
+    following_count = models.PositiveIntegerField("число подписок", default=0)
+
+
+class Recommendation(models.Model):
+    """Кого почитать: топ авторов для пользователя, считается офлайн."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="recommendations",
+        verbose_name="читатель",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="recommended_to",
+        verbose_name="автор",
+    )
+    score = models.FloatField("оценка")
+
+    class Meta:
+        unique_together = ("user", "author")
+        indexes = [
+            models.Index(
+                fields=["user", "-score"], name="recommendation_user_idx"
+            ),
+        ]
@@ -0,0 +1,229 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import Q
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+def encode_token(direction, values):
+    payload = json.dumps({"d": direction, "v": values})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_token(cursor, size):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        direction, values = payload["d"], payload["v"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor("Некорректный курсор")
+    if direction not in (NEXT, PREVIOUS) or len(values) != size:
+        raise InvalidCursor("Некорректный курсор")
+    return direction, values
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации, совместимая с шаблонами Page."""
+
+    def __init__(self, object_list, paginator, cursor, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return "<CursorPage %s>" % (self.cursor or "first")
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def number(self):
+        # Used as a fragment cache key, so it must identify the page.
+        return self.cursor or 1
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], NEXT)
+
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], PREVIOUS)
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (pub_date, pk) без COUNT(*) и OFFSET."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, ordering=("pub_date", "pk")):
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.object_list = object_list.order_by(*self.ordering)
+        self.model = object_list.model
+
+    def _fields(self):
+        return [name.lstrip("-") for name in self.ordering]
+
+    def _get_field(self, name):
+        if name == "pk":
+            return self.model._meta.pk
+        return self.model._meta.get_field(name)
+
+    def encode_cursor(self, obj, direction):
+        values = []
+        for name in self._fields():
+            value = getattr(obj, self._get_field(name).attname)
+            values.append(value.isoformat() if hasattr(value, "isoformat")
+                          else value)
+        return encode_token(direction, values)
+
+    def decode_cursor(self, cursor):
+        fields = self._fields()
+        direction, raw_values = decode_token(cursor, len(fields))
+        try:
+            values = [
+                self._get_field(name).to_python(value)
+                for name, value in zip(fields, raw_values)
+            ]
+        except Exception:
+            raise InvalidCursor("Некорректный курсор")
+        return direction, values
+
+    def _keyset_filter(self, values, reverse):
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip("-")
+            descending = name.startswith("-") != reverse
+            lookup = "%s__%s" % (field, "lt" if descending else "gt")
+            condition |= Q(**equal, **{lookup: value})
+            equal[field] = value
+        return condition
+
+    def page(self, cursor=None):
+        queryset = self.object_list
+        direction = NEXT
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                self._keyset_filter(values, reverse=direction == PREVIOUS)
+            )
+        if direction == PREVIOUS:
+            queryset = queryset.reverse()
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+            return CursorPage(rows, self, cursor, True, has_more)
+        return CursorPage(rows, self, cursor, has_more, bool(cursor))
+
+    def get_page(self, cursor=None):
+        """Как Paginator.get_page: битый курсор отдаёт первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+
+class TimelinePaginator(Paginator):
+    """Paginator по записям TimelineEntry; на странице — их посты."""
+
+    def _get_page(self, object_list, number, paginator):
+        return Page([entry.post for entry in object_list], number, paginator)
+
+
+class TimelineCursorPaginator(CursorPaginator):
+    """Keyset по (pub_date, post_id) записей ленты; на странице — посты."""
+
+    def __init__(self, object_list, per_page):
+        super().__init__(
+            object_list, per_page, ordering=("pub_date", "post_id")
+        )
+
+    def encode_cursor(self, post, direction):
+        # The entry's pub_date is a copy of the post's.
+        return encode_token(direction, [post.pub_date.isoformat(), post.pk])
+
+    def page(self, cursor=None):
+        page = super().page(cursor)
+        page.object_list = [entry.post for entry in page.object_list]
+        return page
+
+
+class SearchPaginator:
+    """Курсорная выдача поиска по (rank, post_id) из posts.search."""
+
+    is_cursor = True
+
+    def __init__(self, engine, query, per_page, queryset):
+        self.engine = engine
+        self.query = query
+        self.per_page = int(per_page)
+        self.queryset = queryset
+
+    def encode_cursor(self, post, direction):
+        return encode_token(direction, [post.search_rank, post.pk])
+
+    def page(self, cursor=None):
+        direction, after, before = NEXT, None, None
+        if cursor:
+            direction, values = decode_token(cursor, 2)
+            try:
+                key = (float(values[0]), int(values[1]))
+            except (TypeError, ValueError):
+                raise InvalidCursor("Некорректный курсор")
+            if direction == NEXT:
+                after = key
+            else:
+                before = key
+        hits = self.engine.search(
+            self.query, self.per_page + 1, after=after, before=before
+        )
+        has_more = len(hits) > self.per_page
+        if direction == PREVIOUS:
+            hits = hits[-self.per_page:] if has_more else hits
+        else:
+            hits = hits[:self.per_page]
+        posts = self.queryset.in_bulk([hit.post_id for hit in hits])
+        rows = []
+        for hit in hits:
+            # The index may briefly outlive rows removed in bulk.
+            if hit.post_id in posts:
+                post = posts[hit.post_id]
+                post.search_rank = hit.rank
+                rows.append(post)
+        if direction == PREVIOUS:
+            return CursorPage(rows, self, cursor, True, has_more)
+        return CursorPage(rows, self, cursor, has_more, bool(cursor))
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
@@ -0,0 +1,111 @@
+"""Read-through кэш страницы профиля.
+
+Шапка автора (имя и счётчики) и отрендеренные страницы его постов лежат
+под версией автора: её увеличивают записи его постов, подписки и правка
+пользователя, а не любые записи на сайте, как у общей версии лент
+(posts.cache). От зрителя зависит только флаг "подписан", он берётся из
+графа подписок (posts.follow_graph).
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from . import counters, follow_graph
+from .cache import get_or_compute
+from .models import Post
+
+User = get_user_model()
+
+
+def _version_key(author_id):
+    return f"profile:version:{author_id}"
+
+
+def _id_key(username):
+    return f"profile:id:{username}"
+
+
+def author_version(author_id):
+    key = _version_key(author_id)
+    version = cache.get(key)
+    if version is None:
+        # As in posts.cache: a lost counter must not reuse old versions.
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_author(*author_ids):
+    for author_id in set(author_ids):
+        key = _version_key(author_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns() // 1000, None)
+
+
+def _load_header(author_id, version):
+    author = (
+        User.objects.filter(pk=author_id)
+        .only("username", "first_name", "last_name")
+        .first()
+    )
+    if author is None:
+        return None
+    stats = counters.user_stats(author)
+    return {
+        "id": author.pk,
+        "version": version,
+        "username": author.username,
+        "full_name": author.get_full_name(),
+        "posts_count": stats.posts_count,
+        "followers_count": stats.followers_count,
+        "following_count": stats.following_count,
+    }
+
+
+def _cached_header(author_id):
+    version = author_version(author_id)
+    return get_or_compute(
+        f"profile:header:{author_id}",
+        lambda: _load_header(author_id, version),
+        settings.FEED_CACHE_TIMEOUT,
+        version=version,
+    )
+
+
+def get_header(username):
+    """Шапка профиля или None, если такого пользователя нет."""
+    author_id = cache.get(_id_key(username))
+    header = None if author_id is None else _cached_header(author_id)
+    if header is None or header["username"] != username:
+        # Unknown name, or the user was renamed or deleted.
+        author_id = (
+            User.objects.filter(username=username)
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if author_id is None:
+            cache.delete(_id_key(username))
+            return None
+        cache.set(_id_key(username), author_id, None)
+        header = _cached_header(author_id)
+    return header
+
+
+def is_following(user, author_id):
+    return user.is_authenticated and follow_graph.follows(user.pk, author_id)
+
+
+def follow_changed(follow):
+    # Both headers show follow counters.
+    bump_author(follow.user_id, follow.author_id)
+
+
+def group_changed(group):
+    # Post cards link to the group by slug.
+    bump_author(
+        *Post.objects.filter(group=group).values_list("author_id", flat=True)
+    )
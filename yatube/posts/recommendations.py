@@ -0,0 +1,246 @@
+"""Кого почитать: рекомендации авторов, посчитанные офлайн.
+
+Граф подписок целиком загружается в разреженные списки смежности
+(отсортированные массивы id), и для каждого пользователя складываются
+три оценки кандидата:
+
+* друзья друзей — строка A·A: на кого подписаны те, на кого подписан он;
+* совместные подписки — строка A·S, где S — косинусная близость авторов
+  по общим подписчикам (AᵀA, нормированная). S считается один раз за
+  сборку, и у каждого автора остаются COFOLLOW_NEIGHBOURS ближайших;
+* близость по группам — косинус между группами постов его авторов
+  (и его собственных) и группами постов кандидата.
+
+Результат — топ RECOMMENDATIONS_TOP на пользователя в Recommendation;
+страница подписок только читает готовые строки.
+"""
+import heapq
+import math
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count
+
+from . import follow_graph
+from .models import Follow, Post, Recommendation
+
+User = get_user_model()
+
+FRIENDS_WEIGHT = 1.0
+COFOLLOW_WEIGHT = 1.0
+GROUP_WEIGHT = 0.5
+# Popular authors offered to users with no signal at all.
+POPULAR_WEIGHT = 0.01
+# Authors per group taken as group-affinity candidates.
+GROUP_CANDIDATES = 20
+# Most similar authors kept per author for co-follow scoring.
+COFOLLOW_NEIGHBOURS = 50
+
+
+def _norm(vector):
+    return math.sqrt(sum(value * value for value in vector.values()))
+
+
+class Graph:
+    """Разреженные матрицы подписок и постов по группам."""
+
+    def __init__(self):
+        self.following = {}
+        self.followers = {}
+        self.author_groups = {}
+        self.group_authors = {}
+        self.neighbours = {}
+        self.popular = []
+
+    @classmethod
+    def load(cls):
+        graph = cls()
+        followers = defaultdict(list)
+        rows = (
+            Follow.objects.order_by("user_id", "author_id")
+            .values_list("user_id", "author_id")
+            .iterator()
+        )
+        for user_id, author_id in rows:
+            ids = graph.following.get(user_id)
+            if ids is None:
+                ids = graph.following[user_id] = array(follow_graph.TYPECODE)
+            ids.append(author_id)
+            followers[author_id].append(user_id)
+        graph.followers = {
+            author_id: array(follow_graph.TYPECODE, ids)
+            for author_id, ids in followers.items()
+        }
+        counts = (
+            Post.objects.exclude(group=None)
+            .order_by()
+            .values_list("author_id", "group_id")
+            .annotate(posts=Count("pk"))
+        )
+        group_authors = defaultdict(list)
+        for author_id, group_id, posts in counts.iterator():
+            graph.author_groups.setdefault(author_id, {})[group_id] = posts
+            group_authors[group_id].append((posts, author_id))
+        graph.group_authors = {
+            group_id: [
+                author_id
+                for _, author_id in heapq.nlargest(GROUP_CANDIDATES, authors)
+            ]
+            for group_id, authors in group_authors.items()
+        }
+        popular = heapq.nlargest(
+            settings.RECOMMENDATIONS_TOP,
+            (
+                (len(ids), author_id)
+                for author_id, ids in graph.followers.items()
+            ),
+        )
+        graph.popular = [author_id for _, author_id in popular]
+        graph.neighbours = graph.similar_authors(COFOLLOW_NEIGHBOURS)
+        return graph
+
+    def similar_authors(self, limit):
+        """{author_id: [(author_id, косинус)]}, не больше limit на автора.
+
+        Общие подписчики пары считаются обходом подписок каждого
+        подписчика автора: O(сумма квадратов числа подписок) за сборку.
+        """
+        neighbours = {}
+        for author_id, readers in self.followers.items():
+            shared = defaultdict(int)
+            for reader in readers:
+                for other in self.following[reader]:
+                    shared[other] += 1
+            shared.pop(author_id, None)
+            norm = math.sqrt(len(readers))
+            similarity = (
+                (other, count / norm / math.sqrt(len(self.followers[other])))
+                for other, count in shared.items()
+            )
+            neighbours[author_id] = heapq.nlargest(
+                limit,
+                similarity,
+                key=lambda item: (item[1], -item[0]),
+            )
+        return neighbours
+
+    def friends_of_friends(self, followed):
+        scores = defaultdict(float)
+        for author_id in followed:
+            for candidate in self.following.get(author_id, ()):
+                scores[candidate] += 1
+        return {
+            candidate: count / len(followed)
+            for candidate, count in scores.items()
+        }
+
+    def cofollow(self, followed):
+        scores = defaultdict(float)
+        for author_id in followed:
+            for candidate, similarity in self.neighbours.get(author_id, ()):
+                scores[candidate] += similarity
+        return {
+            candidate: total / len(followed)
+            for candidate, total in scores.items()
+        }
+
+    def group_profile(self, user_id, followed):
+        profile = defaultdict(float)
+        for author_id in (user_id, *followed):
+            for group_id, posts in self.author_groups.get(
+                author_id, {}
+            ).items():
+                profile[group_id] += posts
+        return profile
+
+    def group_affinity(self, profile, candidates):
+        norm = _norm(profile)
+        scores = {}
+        for candidate in candidates:
+            groups = self.author_groups.get(candidate)
+            if not groups:
+                continue
+            dot = sum(
+                posts * profile.get(group_id, 0)
+                for group_id, posts in groups.items()
+            )
+            if dot:
+                scores[candidate] = dot / (norm * _norm(groups))
+        return scores
+
+    def recommend(self, user_id, top):
+        """[(author_id, оценка)] по убыванию оценки."""
+        followed = self.following.get(user_id, array(follow_graph.TYPECODE))
+        scores = defaultdict(float)
+        if followed:
+            for weight, component in (
+                (FRIENDS_WEIGHT, self.friends_of_friends(followed)),
+                (COFOLLOW_WEIGHT, self.cofollow(followed)),
+            ):
+                for candidate, value in component.items():
+                    scores[candidate] += weight * value
+        profile = self.group_profile(user_id, followed)
+        if profile:
+            candidates = set(scores)
+            for group_id in profile:
+                candidates.update(self.group_authors.get(group_id, ()))
+            affinity = self.group_affinity(profile, candidates)
+            for candidate, value in affinity.items():
+                scores[candidate] += GROUP_WEIGHT * value
+        if not scores:
+            for rank, candidate in enumerate(self.popular):
+                scores[candidate] = POPULAR_WEIGHT / (rank + 1)
+        excluded = set(followed)
+        excluded.add(user_id)
+        return heapq.nlargest(
+            top,
+            (
+                (candidate, score)
+                for candidate, score in scores.items()
+                if candidate not in excluded
+            ),
+            key=lambda item: (item[1], -item[0]),
+        )
+
+
+def build(batch_size, top, user_ids=None):
+    """Пересчитывает рекомендации пачками: (пользователей, строк)."""
+    graph = Graph.load()
+    if user_ids is None:
+        user_ids = User.objects.order_by("pk").values_list("pk", flat=True)
+    user_ids = list(user_ids)
+    rows = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        recommendations = [
+            Recommendation(user_id=user_id, author_id=author_id, score=score)
+            for user_id in batch
+            for author_id, score in graph.recommend(user_id, top)
+        ]
+        with transaction.atomic():
+            Recommendation.objects.filter(user__in=batch).delete()
+            Recommendation.objects.bulk_create(recommendations)
+        rows += len(recommendations)
+    return len(user_ids), rows
+
+
+def for_user(user, limit):
+    """Готовые рекомендации без авторов, на которых он уже подписан."""
+    rows = list(
+        Recommendation.objects.filter(user=user)
+        .select_related("author")
+        .only(
+            "author",
+            "author__username",
+            "author__first_name",
+            "author__last_name",
+        )
+        .order_by("-score")[:settings.RECOMMENDATIONS_TOP]
+    )
+    followed = follow_graph.is_following(
+        user.pk, [row.author_id for row in rows]
+    )
+    return [row for row in rows if not followed[row.author_id]][:limit]
@@ -0,0 +1,213 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Движок выбирается настройкой POSTS_SEARCH_ENGINE, а если она пуста —
+по базе: Fts5SearchEngine для SQLite (таблицу создаёт миграция 0015),
+LikeSearchEngine для остальных. Для PostgreSQL достаточно реализовать
+BaseSearchEngine поверх tsvector.
+"""
+import re
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+SearchHit = namedtuple("SearchHit", ("post_id", "rank"))
+
+WORD_RE = re.compile(r"\w+")
+
+
+class BaseSearchEngine(ABC):
+    """Интерфейс поискового движка; меньший rank — лучшее совпадение.
+
+    Движок без какого-либо из методов не создаётся: ошибка видна в
+    get_engine(), а не при первом сохранении поста.
+    """
+
+    def __init__(self, using="default"):
+        self.using = using
+
+    @abstractmethod
+    def index_post(self, post):
+        pass
+
+    @abstractmethod
+    def remove_post(self, post):
+        pass
+
+    @abstractmethod
+    def index_comment(self, comment):
+        pass
+
+    @abstractmethod
+    def remove_comment(self, comment):
+        pass
+
+    @abstractmethod
+    def search(self, query, limit, after=None, before=None):
+        """Список SearchHit по (rank, post_id).
+
+        after/before — пара (rank, post_id), от которой продолжать выдачу
+        вперёд или назад; так результаты листаются курсором.
+        """
+
+    @abstractmethod
+    def rebuild(self):
+        pass
+
+
+class Fts5SearchEngine(BaseSearchEngine):
+    """Индекс в виртуальной таблице FTS5.
+
+    rowid = 2 * pk для поста и 2 * pk + 1 для комментария, поэтому
+    обновление и удаление идут по первичному ключу индекса.
+    """
+
+    table = "posts_search"
+
+    @cached_property
+    def connection(self):
+        return connections[self.using]
+
+    @staticmethod
+    def match_expression(query):
+        # Quote every word so user input never reaches the FTS5 syntax.
+        return " ".join('"%s"' % word for word in WORD_RE.findall(query))
+
+    def _replace(self, rowid, post_id, body):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid = %s", [rowid]
+            )
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, post_id, body) "
+                "VALUES (%s, %s, %s)",
+                [rowid, post_id, body],
+            )
+
+    def _delete(self, rowid):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid = %s", [rowid]
+            )
+
+    def index_post(self, post):
+        self._replace(2 * post.pk, post.pk, post.text)
+
+    def remove_post(self, post):
+        self._delete(2 * post.pk)
+
+    def index_comment(self, comment):
+        if comment.post_id is None:
+            return
+        self._replace(2 * comment.pk + 1, comment.post_id, comment.text)
+
+    def remove_comment(self, comment):
+        self._delete(2 * comment.pk + 1)
+
+    def search(self, query, limit, after=None, before=None):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        params = [expression]
+        having = ""
+        order = "ASC"
+        if after is not None or before is not None:
+            rank, post_id = after if after is not None else before
+            op = ">" if after is not None else "<"
+            having = (
+                f"HAVING score {op} %s OR (score = %s AND post_id {op} %s)"
+            )
+            params += [rank, rank, post_id]
+            if before is not None:
+                order = "DESC"
+        sql = (
+            "SELECT post_id, MIN(score) AS score FROM ("
+            "  SELECT post_id, rank AS score"
+            f"  FROM {self.table} WHERE {self.table} MATCH %s"
+            f") GROUP BY post_id {having} "
+            f"ORDER BY score {order}, post_id {order} LIMIT %s"
+        )
+        params.append(limit)
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            hits = [SearchHit(*row) for row in cursor.fetchall()]
+        if before is not None:
+            hits.reverse()
+        return hits
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, post_id, body) "
+                "SELECT 2 * id, id, text FROM posts_post"
+            )
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, post_id, body) "
+                "SELECT 2 * id + 1, post_id, text FROM posts_comment "
+                "WHERE post_id IS NOT NULL"
+            )
+
+
+class LikeSearchEngine(BaseSearchEngine):
+    """Поиск без индекса: каждое слово ищется LIKE в тексте поста или
+    его комментариев. Все совпадения равны (rank 0), порядок — по pk.
+    """
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def remove_comment(self, comment):
+        pass
+
+    def search(self, query, limit, after=None, before=None):
+        words = WORD_RE.findall(query)
+        if not words:
+            return []
+        condition = Q()
+        for word in words:
+            condition &= Q(text__icontains=word) | Q(
+                comments__text__icontains=word
+            )
+        post_ids = (
+            Post.objects.using(self.using)
+            .filter(condition)
+            .values_list("pk", flat=True)
+        )
+        if before is not None:
+            post_ids = post_ids.filter(pk__lt=before[1]).order_by("-pk")
+        else:
+            if after is not None:
+                post_ids = post_ids.filter(pk__gt=after[1])
+            post_ids = post_ids.order_by("pk")
+        hits = [SearchHit(pk, 0) for pk in post_ids.distinct()[:limit]]
+        if before is not None:
+            hits.reverse()
+        return hits
+
+    def rebuild(self):
+        pass
+
+
+VENDOR_ENGINES = {"sqlite": "posts.search.Fts5SearchEngine"}
+DEFAULT_ENGINE = "posts.search.LikeSearchEngine"
+
+
+def get_engine(using="default"):
+    path = settings.POSTS_SEARCH_ENGINE
+    if path is None:
+        vendor = connections[using].vendor
+        path = VENDOR_ENGINES.get(vendor, DEFAULT_ENGINE)
+    return import_string(path)(using=using)
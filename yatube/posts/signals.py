@@ -0,0 +1,135 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from . import (
+    blobs,
+    cache,
+    counters,
+    follow_graph,
+    profiles,
+    search,
+    tasks,
+    timeline,
+)
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, **kwargs):
+    if not instance._state.adding:
+        old = Post.objects.filter(pk=instance.pk).values(
+            "group_id", "image"
+        ).first() or {"group_id": None, "image": ""}
+        instance._old_group_id = old["group_id"]
+        instance._old_image = old["image"]
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.post_added(instance)
+        if timeline.is_enabled():
+            timeline.fan_out_post(instance)
+    elif hasattr(instance, "_old_group_id"):
+        counters.post_moved(instance._old_group_id, instance.group_id)
+    image = instance.image.name or ""
+    old_image = "" if created else getattr(instance, "_old_image", image)
+    if image != old_image:
+        if old_image:
+            blobs.release(old_image)
+        if image:
+            blobs.acquire(image)
+            tasks.generate_thumbnails.delay(image)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.post_removed(instance)
+    if instance.image:
+        blobs.release(instance.image.name)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.comment_removed(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.follow_added(instance)
+        follow_graph.follow_added(instance)
+        profiles.follow_changed(instance)
+        if timeline.is_enabled():
+            timeline.add_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.follow_removed(instance)
+    follow_graph.follow_removed(instance)
+    profiles.follow_changed(instance)
+    if timeline.is_enabled():
+        timeline.remove_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_feed_cache(sender, **kwargs):
+    cache.bump_version()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_profile(sender, instance, **kwargs):
+    profiles.bump_author(instance.author_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_profile(sender, instance, **kwargs):
+    profiles.bump_author(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group_profiles(sender, instance, **kwargs):
+    profiles.group_changed(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.get_engine().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_engine().remove_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    search.get_engine().index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.get_engine().remove_comment(instance)
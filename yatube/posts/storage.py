@@ -0,0 +1,79 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from .uploads import EXTENSIONS, SIGNATURE_SIZE, detect_format
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файлы хранятся под хешем содержимого: <каталог>/ab/abcdef...<.ext>.
+
+    Хеш загрузки считает ImageUploadHandler по ходу приёма (атрибут
+    sha256), остальные файлы хешируются при записи во временный файл.
+    Расширение берётся из сигнатуры формата, а не из имени клиента,
+    так что одинаковые картинки занимают место один раз и сохранение
+    повторной загрузки возвращает уже существующее имя. Сколько постов
+    ссылается на файл, считает posts.blobs.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is only known in _save(); equal names are equal
+        # content, so there is nothing to disambiguate.
+        return name
+
+    def get_extension(self, name, content):
+        content.seek(0)
+        header = content.read(SIGNATURE_SIZE)
+        content.seek(0)
+        extension = EXTENSIONS.get(detect_format(header))
+        return extension or os.path.splitext(name)[1].lower()
+
+    def get_hashed_name(self, directory, hexdigest, extension):
+        return "/".join(
+            filter(None, (directory, hexdigest[:2], hexdigest + extension))
+        )
+
+    def _move(self, path, name):
+        os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+        file_move_safe(path, self.path(name))
+        if self.file_permissions_mode is not None:
+            os.chmod(self.path(name), self.file_permissions_mode)
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = self.get_extension(name, content)
+        hexdigest = getattr(content, "sha256", None)
+        if hexdigest is not None:
+            name = self.get_hashed_name(directory, hexdigest, extension)
+            if self.exists(name):
+                return name
+            if hasattr(content, "temporary_file_path"):
+                self._move(content.temporary_file_path(), name)
+                return name
+        os.makedirs(self.path(directory), exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(
+            dir=self.path(directory), suffix=".upload"
+        )
+        try:
+            with os.fdopen(fd, "wb") as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            name = self.get_hashed_name(
+                directory, digest.hexdigest(), extension
+            )
+            if self.exists(name):
+                os.remove(temp_path)
+            else:
+                self._move(temp_path, name)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
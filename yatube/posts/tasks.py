@@ -0,0 +1,27 @@
+from django.conf import settings
+
+from taskqueue.queue import task
+
+from . import blobs, counters, recommendations, thumbnails
+
+
+@task
+def generate_thumbnails(name):
+    thumbnails.generate(name)
+
+
+@task
+def delete_image_files(name, variants):
+    blobs.delete_files(name, variants)
+
+
+@task
+def reconcile_counters():
+    counters.reconcile()
+
+
+@task
+def build_recommendations():
+    recommendations.build(
+        settings.RECOMMENDATIONS_BATCH_SIZE, settings.RECOMMENDATIONS_TOP
+    )
@@ -0,0 +1,30 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image, alias):
+    """Готовая миниатюра картинки или сам оригинал, пока её нет.
+
+    {% load post_thumbnails %}
+    {% post_thumbnail post.image "card" as im %}
+    """
+    if not image:
+        return None
+    return thumbnails.get(image, alias) or image
+
+
+@register.inclusion_tag("posts/includes/picture.html")
+def post_picture(post, alias="card"):
+    """<picture> с вариантами картинки поста и миниатюрой alias в <img>.
+
+    {% load post_thumbnails %}
+    {% post_picture post %}
+    """
+    return {
+        "thumbnail": post_thumbnail(post.image, alias),
+        "sources": thumbnails.sources(post),
+    }
@@ -0,0 +1,76 @@
+from django import template
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags.cache import CacheNode
+
+from posts.cache import get_or_compute
+
+register = template.Library()
+
+
+class StaleCacheNode(CacheNode):
+    def __init__(self, *args, version_var=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version_var = version_var
+
+    def render(self, context):
+        try:
+            expire_time = self.expire_time_var.resolve(context)
+        except template.VariableDoesNotExist:
+            raise template.TemplateSyntaxError(
+                '"stale_cache" tag got an unknown variable: %r'
+                % self.expire_time_var.var
+            )
+        if expire_time is not None:
+            expire_time = int(expire_time)
+        if self.cache_name:
+            fragment_cache = caches[self.cache_name.resolve(context)]
+        else:
+            try:
+                fragment_cache = caches["template_fragments"]
+            except InvalidCacheBackendError:
+                fragment_cache = caches["default"]
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        version = None
+        if self.version_var is not None:
+            version = self.version_var.resolve(context)
+        return get_or_compute(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            expire_time,
+            fragment_cache,
+            version,
+        )
+
+
+@register.tag("stale_cache")
+def do_stale_cache(parser, token):
+    """Как {% cache %}, но с защитой от одновременного пересчёта.
+
+    {% load stale_cache %}
+    {% stale_cache [expire_time] [fragment_name] [var1] .. version=.. %}
+        ...
+    {% endstale_cache %}
+
+    version не входит в ключ: фрагмент прежней версии отдаётся, пока
+    новый рендерит один воркер.
+    """
+    nodelist = parser.parse(("endstale_cache",))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            "%r tag requires at least 2 arguments." % tokens[0]
+        )
+    options = {}
+    while len(tokens) > 3 and tokens[-1].startswith(("using=", "version=")):
+        name, value = tokens.pop().split("=", 1)
+        options[name] = parser.compile_filter(value)
+    return StaleCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(t) for t in tokens[3:]],
+        options.get("using"),
+        version_var=options.get("version"),
+    )
@@ -0,0 +1,229 @@
+import time
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import cache as feed_cache
+from posts import profiles
+from posts.context_processors import feed_cache as feed_cache_context
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class FeedCacheVersionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.group = Group.objects.create(
+            title="test-group",
+            slug="test-slug",
+            description="test-description",
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text="test-text", group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_writes_bump_version(self):
+        """Записи постов, комментариев и групп меняют версию"""
+        writes = {
+            "post": lambda: Post.objects.create(
+                author=self.user, text="test-new"
+            ),
+            "comment": lambda: Comment.objects.create(
+                post=self.post, author=self.user, text="test-comment"
+            ),
+            "group": lambda: self.group.save(),
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                version = feed_cache.get_version()
+                write()
+                self.assertGreater(feed_cache.get_version(), version)
+
+    def test_new_post_shown_immediately(self):
+        """Новый пост сразу виден на закешированных страницах"""
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": "test-slug"}),
+            reverse("posts:profile", kwargs={"username": "auth"}),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+        Post.objects.create(
+            author=self.user, text="test-fresh-post", group=self.group
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn("test-fresh-post", response.content.decode())
+
+    def test_lost_version_is_not_reused(self):
+        """После вытеснения ключа версия не повторяет старые значения"""
+        old = feed_cache.bump_version()
+        cache.delete(feed_cache.VERSION_KEY)
+        self.assertGreater(feed_cache.get_version(), old)
+
+
+@override_settings(FEED_CACHE_LOCK_WAIT=0)
+class StaleCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_stale_value_served_while_locked(self):
+        """Пока другой воркер пересчитывает, отдаётся устаревшее значение"""
+        cache.set("fragment", ("stale", time.time() - 1, 0.1, None))
+        cache.add("fragment:lock", 1)
+        value = feed_cache.get_or_compute(
+            "fragment", lambda: self.fail("recomputed"), 60
+        )
+        self.assertEqual(value, "stale")
+
+    def test_expired_value_recomputed_once(self):
+        """Истёкшее значение пересчитывает тот, кто взял блокировку"""
+        cache.set("fragment", ("stale", time.time() - 1, 0.1, None))
+        value = feed_cache.get_or_compute("fragment", lambda: "fresh", 60)
+        self.assertEqual(value, "fresh")
+        self.assertIsNone(cache.get("fragment:lock"))
+        self.assertEqual(cache.get("fragment")[0], "fresh")
+
+    def test_old_version_served_while_locked(self):
+        """После записи прежняя версия отдаётся, пока идёт пересчёт"""
+        feed_cache.get_or_compute("fragment", lambda: "old", 60, version=1)
+        cache.add("fragment:lock", 1)
+        value = feed_cache.get_or_compute(
+            "fragment", lambda: self.fail("recomputed"), 60, version=2
+        )
+        self.assertEqual(value, "old")
+        cache.delete("fragment:lock")
+        value = feed_cache.get_or_compute(
+            "fragment", lambda: "new", 60, version=2
+        )
+        self.assertEqual(value, "new")
+        self.assertEqual(cache.get("fragment")[3], 2)
+
+    def test_write_recomputes_page_once(self):
+        """Запись поста: страницу пересчитывает держатель блокировки,
+        остальные получают прежнюю"""
+        user = User.objects.create_user(username="auth")
+        Post.objects.create(author=user, text="test-old-post")
+        url = reverse("posts:index")
+        Client().get(url)
+        Post.objects.create(author=user, text="test-fresh-post")
+        key = make_template_fragment_key("page_index", [1])
+        cache.add(key + ":lock", 1)
+        response = Client().get(url)
+        self.assertContains(response, "test-old-post")
+        self.assertNotContains(response, "test-fresh-post")
+        cache.delete(key + ":lock")
+        response = Client().get(url)
+        self.assertContains(response, "test-fresh-post")
+
+    def test_tag_is_drop_in_for_cache(self):
+        """{% stale_cache %} принимает аргументы {% cache %}"""
+        template = Template(
+            "{% load stale_cache %}"
+            "{% stale_cache 60 fragment key %}{{ text }}{% endstale_cache %}"
+        )
+        first = template.render(Context({"key": 1, "text": "first"}))
+        cached = template.render(Context({"key": 1, "text": "second"}))
+        other = template.render(Context({"key": 2, "text": "second"}))
+        self.assertEqual(first, "first")
+        self.assertEqual(cached, "first")
+        self.assertEqual(other, "second")
+
+    def test_write_during_render_is_not_cached_as_new(self):
+        """Фрагмент хранится под версией, прочитанной до рендеринга"""
+        template = Template(
+            "{% load stale_cache %}"
+            "{% stale_cache 60 fragment version=feed_cache_version %}"
+            "{{ text }}{% endstale_cache %}"
+        )
+
+        def write_while_rendering():
+            feed_cache.bump_version()
+            return "old"
+
+        context = feed_cache_context(None)
+        first = template.render(
+            Context({**context, "text": write_while_rendering})
+        )
+        second = template.render(Context({**context, "text": "new"}))
+        self.assertEqual(first, "old")
+        self.assertEqual(second, "new")
+
+
+class ProfileCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.other = User.objects.create_user(username="other")
+        cls.reader = User.objects.create_user(username="reader")
+        Post.objects.create(author=cls.author, text="test-text")
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.url = reverse("posts:profile", kwargs={"username": "author"})
+
+    def test_warm_profile_runs_no_queries(self):
+        """Повторный просмотр профиля гостем не ходит в базу"""
+        self.guest_client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(self.url)
+        self.assertContains(response, "test-text")
+
+    def test_page_key_ignores_other_parameters(self):
+        """Лишние параметры и номера за концом не создают новых записей"""
+        self.guest_client.get(self.url)
+        for query in ("?utm=1", "?page=1&utm=" + "x" * 100, "?page=99"):
+            with self.subTest(query=query):
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(self.url + query)
+                self.assertContains(response, "test-text")
+
+    @override_settings(CURSOR_PAGINATED_VIEWS=("profile",))
+    def test_page_key_normalizes_cursor(self):
+        """Битый курсор делит запись с первой страницей"""
+        self.guest_client.get(self.url)
+        with self.assertNumQueries(0):
+            self.guest_client.get(self.url + "?cursor=broken")
+
+    def test_only_author_writes_invalidate(self):
+        """Версию профиля меняют посты автора, а не чужие"""
+        version = profiles.author_version(self.author.pk)
+        Post.objects.create(author=self.other, text="test-other")
+        self.assertEqual(profiles.author_version(self.author.pk), version)
+        Post.objects.create(author=self.author, text="test-new")
+        self.assertGreater(profiles.author_version(self.author.pk), version)
+        self.assertContains(self.guest_client.get(self.url), "test-new")
+
+    def test_following_flag_varies_per_viewer(self):
+        """Флаг подписки свой у каждого зрителя, счётчики обновляются"""
+        self.guest_client.get(self.url)
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(self.url)
+        self.assertTrue(response.context["following"])
+        self.assertEqual(response.context["profile"]["followers_count"], 1)
+        response = self.guest_client.get(self.url)
+        self.assertFalse(response.context["following"])
+
+    def test_renamed_author_old_name_not_found(self):
+        """Старое имя переименованного автора отдаёт 404"""
+        self.guest_client.get(self.url)
+        author = User.objects.get(pk=self.author.pk)
+        author.username = "renamed"
+        author.save()
+        self.assertEqual(self.guest_client.get(self.url).status_code, 404)
+        response = self.guest_client.get(
+            reverse("posts:profile", kwargs={"username": "renamed"})
+        )
+        self.assertContains(response, "test-text")
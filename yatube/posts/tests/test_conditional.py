@@ -0,0 +1,80 @@
+import time
+from http import HTTPStatus
+
+from core.test_runner import run_on_commit
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="test-group",
+            slug="test-slug",
+            description="test-description",
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text="test-text", group=cls.group
+        )
+        cls.urls = (
+            reverse("posts:group_list", kwargs={"slug": "test-slug"}),
+            reverse("posts:profile", kwargs={"username": "auth"}),
+            reverse("posts:post_detail", kwargs={"post_id": cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_matching_etag_returns_not_modified(self):
+        """Совпавший ETag отдаёт 304 без рендеринга шаблона"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)["ETag"]
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.templates, [])
+
+    def test_if_modified_since_alone_renders_page(self):
+        """Без ETag клиент с If-Modified-Since получает страницу зрителя"""
+        since = http_date(time.time() + 3600)
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertFalse(
+                    self.guest_client.get(url).has_header("Last-Modified")
+                )
+                for client, query in (
+                    (self.reader_client, {}),
+                    (self.guest_client, {"page": 2}),
+                ):
+                    response = client.get(
+                        url, query, HTTP_IF_MODIFIED_SINCE=since
+                    )
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_changes_after_comment(self):
+        """Новый комментарий меняет ETag страницы поста"""
+        url = self.urls[2]
+        etag = self.guest_client.get(url)["ETag"]
+        Comment.objects.create(post=self.post, author=self.user, text="new")
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_profile_etag_varies_with_following(self):
+        """Подписка зрителя меняет ETag профиля"""
+        url = self.urls[1]
+        etag = self.reader_client.get(url)["ETag"]
+        with run_on_commit():
+            Follow.objects.create(user=self.reader, author=self.user)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context["following"])
@@ -0,0 +1,90 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import counters
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="test-group",
+            slug="test-slug",
+            description="test-description",
+        )
+        cls.group2 = Group.objects.create(
+            title="test-group2",
+            slug="test-slug2",
+            description="test-description2",
+        )
+
+    def test_post_write_paths_update_counters(self):
+        """Создание, перенос и удаление поста меняют счётчики"""
+        post = Post.objects.create(
+            author=self.author, text="test-text", group=self.group
+        )
+        self.assertEqual(counters.user_stats(self.author).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post.group = self.group2
+        post.save()
+        self.group.refresh_from_db()
+        self.group2.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.group2.posts_count, 1)
+        post.delete()
+        self.assertEqual(counters.user_stats(self.author).posts_count, 0)
+
+    def test_comment_and_follow_update_counters(self):
+        """Комментарии и подписки меняют счётчики"""
+        post = Post.objects.create(author=self.author, text="test-text")
+        Comment.objects.create(post=post, author=self.reader, text="test")
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(counters.user_stats(self.author).followers_count, 1)
+        self.assertEqual(counters.user_stats(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(counters.user_stats(self.author).followers_count, 0)
+
+    def test_user_delete_leaves_no_stats(self):
+        """Каскадное удаление пользователя не пересоздаёт его счётчики"""
+        user = User.objects.create_user(username="leaving")
+        post = Post.objects.create(author=user, text="test-text")
+        Comment.objects.create(post=post, author=user, text="test")
+        Follow.objects.create(user=user, author=self.author)
+        Follow.objects.create(user=self.reader, author=user)
+        pk = user.pk
+        user.delete()
+        self.assertFalse(UserStats.objects.filter(pk=pk).exists())
+        self.assertEqual(counters.user_stats(self.author).followers_count, 0)
+        self.assertEqual(counters.user_stats(self.reader).following_count, 0)
+
+    def test_profile_reads_counter_without_count(self):
+        """Профиль берёт число постов из счётчика"""
+        Post.objects.create(author=self.author, text="test-text")
+        response = Client().get(
+            reverse("posts:profile", kwargs={"username": "author"})
+        )
+        self.assertEqual(response.context["post_all"], 1)
+
+    def test_reconcile_command_fixes_drift(self):
+        """reconcile_counters исправляет расхождения после bulk_create"""
+        Post.objects.bulk_create(
+            Post(author=self.author, text="test-bulk", group=self.group)
+            for _ in range(3)
+        )
+        UserStats.objects.update_or_create(
+            pk=self.author.pk, defaults={"posts_count": 0}
+        )
+        call_command("reconcile_counters", stdout=StringIO())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 3)
+        self.assertEqual(counters.user_stats(self.author).posts_count, 3)
+        self.assertEqual(counters.user_stats(self.reader).posts_count, 0)
@@ -0,0 +1,79 @@
+from core.test_runner import run_on_commit
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import follow_graph
+from posts.models import Follow, User
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="reader")
+        cls.authors = [
+            User.objects.create_user(username=f"author{i}") for i in range(3)
+        ]
+        for author in cls.authors[:2]:
+            Follow.objects.create(user=cls.reader, author=author)
+        Follow.objects.create(user=cls.authors[0], author=cls.reader)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_bulk_is_following(self):
+        """is_following отвечает по всем авторам одним чтением"""
+        ids = [author.pk for author in self.authors]
+        follow_graph.following(self.reader.pk)
+        with self.assertNumQueries(0):
+            result = follow_graph.is_following(self.reader.pk, ids)
+        self.assertEqual(result, {ids[0]: True, ids[1]: True, ids[2]: False})
+
+    def test_counts_and_mutuals(self):
+        """Число подписчиков и взаимные подписки"""
+        self.assertEqual(follow_graph.follower_count(self.authors[0].pk), 1)
+        self.assertEqual(follow_graph.follower_count(self.reader.pk), 1)
+        self.assertTrue(
+            follow_graph.is_mutual(self.reader.pk, self.authors[0].pk)
+        )
+        self.assertFalse(
+            follow_graph.is_mutual(self.reader.pk, self.authors[1].pk)
+        )
+        self.assertEqual(
+            list(follow_graph.mutuals(self.reader.pk)), [self.authors[0].pk]
+        )
+
+    def test_follow_views_refresh_graph(self):
+        """После подписки и отписки граф перечитывается из Follow"""
+        author = self.authors[2]
+        follow_graph.following(self.reader.pk)
+        follow_graph.followers(author.pk)
+        with run_on_commit():
+            self.reader_client.get(
+                reverse("posts:profile_follow", kwargs={"username": "author2"})
+            )
+        self.assertTrue(follow_graph.follows(self.reader.pk, author.pk))
+        self.assertEqual(follow_graph.follower_count(author.pk), 1)
+        with run_on_commit():
+            self.reader_client.get(
+                reverse(
+                    "posts:profile_unfollow", kwargs={"username": "author2"}
+                )
+            )
+        self.assertFalse(follow_graph.follows(self.reader.pk, author.pk))
+        self.assertEqual(follow_graph.follower_count(author.pk), 0)
+
+    def test_entries_dropped_after_commit(self):
+        """Массивы сбрасываются только после коммита записи"""
+        keys = [
+            follow_graph._following_key(self.reader.pk),
+            follow_graph._followers_key(self.authors[2].pk),
+        ]
+        follow_graph.following(self.reader.pk)
+        follow_graph.followers(self.authors[2].pk)
+        with run_on_commit():
+            Follow.objects.create(user=self.reader, author=self.authors[2])
+            self.assertEqual(len(cache.get_many(keys)), 2)
+        self.assertEqual(cache.get_many(keys), {})
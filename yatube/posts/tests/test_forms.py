@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -120,10 +121,12 @@ class PostFormTests(TestCase):
         )
 
         self.assertEqual(Post.objects.count(), tasks_count + 1, "Not created")
-        # Проверяем, что создалась запись с нашей картинкой
+        # Проверяем, что создалась запись с нашей картинкой,
+        # сохранённой под хешем содержимого
+        digest = hashlib.sha256(small_gif).hexdigest()
         self.assertTrue(
             Post.objects.filter(
-                image="posts/small.gif",
+                image=f"posts/{digest[:2]}/{digest}.gif",
             ).exists()
         )
 
@@ -0,0 +1,72 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Group, Post, User
+from posts.paginators import CursorPage, CursorPaginator
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.group = Group.objects.create(
+            title="test-group",
+            slug="test-slug",
+            description="test-description",
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text="test-text" + str(i), group=cls.group)
+            for i in range(1, 26)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_pages_follow_each_other(self):
+        """Курсоры next/previous обходят ленту без пропусков и повторов"""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor())
+        third = paginator.page(second.next_cursor())
+        texts = [post.text for page in (first, second, third) for post in page]
+        self.assertEqual(
+            texts, ["test-text" + str(i) for i in range(1, 26)]
+        )
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+        self.assertEqual(len(third), 5)
+        back = paginator.page(third.previous_cursor())
+        self.assertEqual(list(back), list(second))
+        self.assertTrue(back.has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Битый курсор отдаёт первую страницу"""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.get_page("not-a-cursor")
+        self.assertEqual(page[0].text, "test-text1")
+
+    def test_cursor_page_costs_one_query(self):
+        """Страница курсора читается одним запросом без COUNT"""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        cursor = paginator.page().next_cursor()
+        with self.assertNumQueries(1):
+            paginator.page(cursor)
+
+    @override_settings(CURSOR_PAGINATED_VIEWS=("index", "group_posts"))
+    def test_views_use_cursor_when_enabled(self):
+        """Ленты из CURSOR_PAGINATED_VIEWS отдают CursorPage"""
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": "test-slug"}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                page_obj = response.context["page_obj"]
+                self.assertIsInstance(page_obj, CursorPage)
+                response = self.guest_client.get(
+                    url, {"cursor": page_obj.next_cursor()}
+                )
+                self.assertEqual(
+                    response.context["page_obj"][0].text, "test-text11"
+                )
@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.management.commands import explain_feeds
+from posts.models import Follow, Group, Post, User
+
+
+class FeedQueryCountTest(TestCase):
+    """Число запросов ленты не растёт с числом постов на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username="author", first_name="Имя", last_name="Фамилия"
+        )
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="test-group",
+            slug="test-slug",
+            description="test-description",
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def add_posts(self, amount):
+        for i in range(amount):
+            Post.objects.create(
+                author=self.author, text="test-text" + str(i), group=self.group
+            )
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.reader_client.get(url)
+        return len(queries)
+
+    def test_feed_pages_have_no_n_plus_one(self):
+        """Страницы лент не делают запрос на каждый пост"""
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": "test-slug"}),
+            reverse("posts:profile", kwargs={"username": "author"}),
+            reverse("posts:follow_index"),
+        )
+        self.add_posts(1)
+        single = {url: self.count_queries(url) for url in urls}
+        self.add_posts(settings.DEFAULT_POSTS_ON_PAGE)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), single[url])
+
+    def test_post_detail_comments_have_no_n_plus_one(self):
+        """Авторы комментариев загружаются вместе с комментариями"""
+        post = Post.objects.create(author=self.author, text="test-detail")
+        url = reverse("posts:post_detail", kwargs={"post_id": post.pk})
+        post.comments.create(author=self.reader, text="test-comment")
+        single = self.count_queries(url)
+        for i in range(settings.COMMENTS_ON_PAGE * 2):
+            commenter = User.objects.create_user(username=f"commenter{i}")
+            post.comments.create(author=commenter, text="test-comment")
+        self.assertEqual(self.count_queries(url), single)
+
+    def test_post_detail_loads_author_and_group_together(self):
+        """post_detail получает автора и группу вместе с постом"""
+        post = Post.objects.create(
+            author=self.author, text="test-detail", group=self.group
+        )
+        post = Post.objects.feed().get(pk=post.pk)
+        with self.assertNumQueries(0):
+            post.author.get_full_name()
+            post.group.slug
+
+
+class ExplainFeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username="author")
+        reader = User.objects.create_user(username="reader")
+        group = Group.objects.create(
+            title="test-group",
+            slug="test-slug",
+            description="test-description",
+        )
+        post = Post.objects.create(author=author, text="test", group=group)
+        Follow.objects.create(user=reader, author=author)
+        post.comments.create(author=reader, text="test-comment")
+
+    def page_plans(self):
+        """Планы запросов страниц (с LIMIT) по представлениям."""
+        plans = {}
+        for name, queries in explain_feeds.Command().plans():
+            plans[name] = [plan for sql, plan in queries if "LIMIT" in sql]
+        return plans
+
+    def test_pages_read_in_index_order(self):
+        """Страницы лент читаются по индексу: без full scan и сортировки"""
+        cursor_views = ("index", "group_posts", "profile", "follow_index")
+        for views in ((), cursor_views):
+            with self.settings(CURSOR_PAGINATED_VIEWS=views):
+                cache.clear()
+                plans = self.page_plans()
+            for view in cursor_views + ("post_detail",):
+                with self.subTest(view=view, cursor=view in views):
+                    self.assertTrue(plans[view])
+                    for plan in plans[view]:
+                        for line in plan:
+                            self.assertFalse(
+                                line.startswith("SCAN posts_post")
+                                and "USING" not in line,
+                                plan,
+                            )
+                            self.assertNotIn("TEMP B-TREE", line, plan)
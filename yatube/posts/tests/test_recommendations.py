@@ -0,0 +1,95 @@
+from io import StringIO
+
+from core.test_runner import run_on_commit
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import recommendations
+from posts.models import Follow, Group, Post, Recommendation, User
+
+
+class RecommendationsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        names = ("reader", "author", "friend", "similar", "grouped", "other")
+        cls.users = {
+            name: User.objects.create_user(username=name) for name in names
+        }
+        group = Group.objects.create(
+            title="test-group", slug="test-slug", description="test"
+        )
+        for user, author in (
+            ("reader", "author"),
+            # friend of a friend
+            ("author", "friend"),
+            # followed together with author
+            ("other", "author"),
+            ("other", "similar"),
+        ):
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+        for author in ("author", "grouped"):
+            Post.objects.create(
+                author=cls.users[author], text="test-text", group=group
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def recommended(self, name):
+        return [
+            row.author.username
+            for row in Recommendation.objects.filter(
+                user=self.users[name]
+            ).order_by("-score")
+        ]
+
+    def test_build_scores_graph_and_groups(self):
+        """Друзья друзей, совместные подписки и группы дают кандидатов"""
+        out = StringIO()
+        call_command("build_recommendations", batch_size=2, stdout=out)
+        self.assertIn("Пользователей: 6", out.getvalue())
+        recommended = self.recommended("reader")
+        self.assertEqual(
+            set(recommended), {"friend", "similar", "grouped"}
+        )
+        self.assertNotIn("author", recommended)
+        self.assertNotIn("reader", recommended)
+
+    def test_similar_authors_capped(self):
+        """Близкие авторы считаются один раз и обрезаются до лимита"""
+        ids = {name: user.pk for name, user in self.users.items()}
+        graph = recommendations.Graph.load()
+        self.assertEqual(
+            graph.neighbours[ids["author"]],
+            [(ids["similar"], 1 / 2 ** 0.5)],
+        )
+        Follow.objects.create(
+            user=self.users["reader"], author=self.users["grouped"]
+        )
+        graph = recommendations.Graph.load()
+        self.assertEqual(len(graph.similar_authors(1)[ids["author"]]), 1)
+        self.assertEqual(len(graph.similar_authors(2)[ids["author"]]), 2)
+
+    def test_cold_start_gets_popular_authors(self):
+        """Без подписок и постов предлагаются популярные авторы"""
+        recommendations.build(10, 3)
+        self.assertEqual(self.recommended("similar")[0], "author")
+
+    def test_follow_page_hides_followed(self):
+        """Страница подписок показывает готовые рекомендации без подписок"""
+        recommendations.build(10, 5)
+        client = Client()
+        client.force_login(self.users["reader"])
+        url = reverse("posts:follow_index")
+        shown = client.get(url).context["recommendations"]
+        self.assertIn("friend", [row.author.username for row in shown])
+        with run_on_commit():
+            Follow.objects.create(
+                user=self.users["reader"], author=self.users["friend"]
+            )
+        shown = client.get(url).context["recommendations"]
+        self.assertNotIn("friend", [row.author.username for row in shown])
@@ -0,0 +1,122 @@
+from django.contrib.admin.sites import site
+from django.test import Client, RequestFactory, TestCase
+from django.test import override_settings
+from django.urls import reverse
+from posts import search
+from posts.models import Comment, Post, User
+
+
+class PartialEngine(search.BaseSearchEngine):
+    def search(self, query, limit, after=None, before=None):
+        return []
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.post = Post.objects.create(
+            author=cls.user, text="Рецепт борща со сметаной"
+        )
+        cls.other = Post.objects.create(author=cls.user, text="Погода")
+        Comment.objects.create(
+            post=cls.other, author=cls.user, text="Без сметаны никак"
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.engine = search.get_engine()
+
+    def hit_ids(self, query):
+        return [hit.post_id for hit in self.engine.search(query, 10)]
+
+    def test_index_follows_saves_and_deletes(self):
+        """Индекс обновляется при сохранении и удалении"""
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(self.hit_ids("борща"), [post.pk])
+        post.text = "Рецепт солянки"
+        post.save()
+        self.assertEqual(self.hit_ids("борща"), [])
+        self.assertEqual(self.hit_ids("солянки"), [post.pk])
+        post.delete()
+        self.assertEqual(self.hit_ids("солянки"), [])
+
+    def test_comments_are_searchable(self):
+        """Поиск находит пост по тексту комментария"""
+        self.assertEqual(self.hit_ids("сметаны"), [self.other.pk])
+
+    def test_query_syntax_is_escaped(self):
+        """Синтаксис FTS5 в запросе не ломает поиск"""
+        self.assertEqual(self.hit_ids('борща"* (:'), [self.post.pk])
+        self.assertEqual(self.hit_ids("***"), [])
+
+    def test_search_page_pages_by_cursor(self):
+        """Страница поиска листается курсором"""
+        Post.objects.bulk_create(
+            Post(author=self.user, text="новость " + str(i))
+            for i in range(15)
+        )
+        self.engine.rebuild()
+        url = reverse("posts:search")
+        first = self.guest_client.get(url, {"q": "новость"})
+        page_obj = first.context["page_obj"]
+        self.assertEqual(len(page_obj), 10)
+        second = self.guest_client.get(
+            url, {"q": "новость", "cursor": page_obj.next_cursor()}
+        )
+        self.assertEqual(len(second.context["page_obj"]), 5)
+        seen = {post.pk for post in page_obj}
+        seen |= {post.pk for post in second.context["page_obj"]}
+        self.assertEqual(len(seen), 15)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через индекс"""
+        model_admin = site._registry[Post]
+        request = RequestFactory().get("/admin/posts/post/")
+        queryset, use_distinct = model_admin.get_search_results(
+            request, Post.objects.all(), "сметаны"
+        )
+        self.assertEqual(list(queryset), [self.other])
+        self.assertFalse(use_distinct)
+
+
+@override_settings(POSTS_SEARCH_ENGINE="posts.search.LikeSearchEngine")
+class LikeSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.posts = Post.objects.bulk_create(
+            Post(author=cls.user, text="новость " + str(i)) for i in range(12)
+        )
+        post = Post.objects.create(author=cls.user, text="Погода")
+        Comment.objects.create(post=post, author=cls.user, text="новость")
+
+    @override_settings(
+        POSTS_SEARCH_ENGINE="posts.tests.test_search.PartialEngine"
+    )
+    def test_incomplete_engine_not_created(self):
+        """Движок без всех методов интерфейса не создаётся"""
+        with self.assertRaises(TypeError):
+            search.get_engine()
+
+    def test_engine_follows_backend(self):
+        """Без настройки движок выбирается по базе"""
+        with override_settings(POSTS_SEARCH_ENGINE=None):
+            self.assertIsInstance(
+                search.get_engine(), search.Fts5SearchEngine
+            )
+        self.assertIsInstance(search.get_engine(), search.LikeSearchEngine)
+
+    def test_search_page_without_index(self):
+        """Поиск без FTS5 находит посты и комментарии и листается"""
+        url = reverse("posts:search")
+        first = Client().get(url, {"q": "новость"})
+        page_obj = first.context["page_obj"]
+        self.assertEqual(len(page_obj), 10)
+        second = Client().get(
+            url, {"q": "новость", "cursor": page_obj.next_cursor()}
+        )
+        self.assertEqual(len(second.context["page_obj"]), 3)
+        self.assertContains(second, "Погода")
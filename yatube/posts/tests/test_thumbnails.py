@@ -0,0 +1,174 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import thumbnails
+from posts.models import ImageBlob, Post, User
+from sorl.thumbnail import default
+from taskqueue.models import Task
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def create_post(self, name):
+        return Post.objects.create(
+            author=self.user,
+            text="test-text",
+            image=SimpleUploadedFile(
+                name=name, content=SMALL_GIF, content_type="image/gif"
+            ),
+        )
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_thumbnails_built_on_save(self):
+        """Миниатюры строятся при сохранении и попадают в шаблон"""
+        post = self.create_post("saved.gif")
+        thumbnail = thumbnails.get(post.image, "card")
+        self.assertIsNotNone(thumbnail)
+        with mock.patch.object(default.engine, "get_image") as get_image:
+            response = self.guest_client.get(reverse("posts:index"))
+        get_image.assert_not_called()
+        self.assertContains(response, thumbnail.url)
+
+    def test_template_never_resizes(self):
+        """Пока миниатюры нет, шаблон отдаёт оригинал, не открывая его"""
+        # Generation is queued for the worker, which does not run here.
+        post = self.create_post("pending.gif")
+        queued = Task.objects.filter(name="posts.tasks.generate_thumbnails")
+        self.assertTrue(queued.exists())
+        self.assertIsNone(thumbnails.get(post.image, "card"))
+        with mock.patch.object(default.engine, "get_image") as get_image:
+            response = self.guest_client.get(
+                reverse("posts:post_detail", kwargs={"post_id": post.pk})
+            )
+        get_image.assert_not_called()
+        self.assertContains(response, post.image.url)
+
+    def test_build_thumbnails_command(self):
+        """build_thumbnails строит миниатюры существующих картинок"""
+        post = self.create_post("backfill.gif")
+        out = StringIO()
+        call_command("build_thumbnails", workers=0, stdout=out)
+        self.assertIn("Картинок: 1", out.getvalue())
+        self.assertIsNotNone(thumbnails.get(post.image, "card"))
+
+    @override_settings(
+        TASKS_ALWAYS_EAGER=True, POST_IMAGE_FORMATS=("png",)
+    )
+    def test_variants_in_picture(self):
+        """Варианты картинки сохраняются в посте и выводятся в <picture>"""
+        post = self.create_post("variants.gif")
+        post.refresh_from_db()
+        data = json.loads(post.image_variants)
+        self.assertEqual(data["source"], post.image.name)
+        self.assertEqual(
+            {(v["format"], v["width"]) for v in data["variants"]},
+            {
+                (fmt, width)
+                for fmt in ("gif", "png")
+                for width in settings.POST_IMAGE_WIDTHS
+            },
+        )
+        response = self.guest_client.get(
+            reverse("posts:post_detail", kwargs={"post_id": post.pk})
+        )
+        content = response.content.decode()
+        self.assertIn('<source type="image/png"', content)
+        self.assertLess(
+            content.index("image/png"), content.index("image/gif")
+        )
+        self.assertIn(f"{data['variants'][0]['name']} 480w", content)
+
+    @override_settings(
+        TASKS_ALWAYS_EAGER=True, POST_IMAGE_FORMATS=("nope",)
+    )
+    def test_unsupported_formats_skipped(self):
+        """Форматы, которых нет в Pillow, пропускаются"""
+        post = self.create_post("skipped.gif")
+        post.refresh_from_db()
+        variants = json.loads(post.image_variants)["variants"]
+        self.assertEqual({v["format"] for v in variants}, {"gif"})
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TASKS_ALWAYS_EAGER=True)
+class ImageDedupTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def create_post(self, name):
+        return Post.objects.create(
+            author=self.user,
+            text="test-text",
+            image=SimpleUploadedFile(
+                name=name, content=SMALL_GIF, content_type="image/gif"
+            ),
+        )
+
+    def test_same_content_stored_once(self):
+        """Одинаковые загрузки хранятся и обрабатываются один раз"""
+        first = self.create_post("one.gif")
+        with mock.patch.object(
+            thumbnails, "build_variants"
+        ) as build_variants:
+            second = self.create_post("two.gif")
+        build_variants.assert_not_called()
+        self.assertEqual(first.image.name, second.image.name)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertNotEqual(first.image_variants, "")
+        self.assertEqual(second.image_variants, first.image_variants)
+        self.assertEqual(ImageBlob.objects.get(pk=first.image.name).refs, 2)
+
+    def test_last_reference_deletes_files(self):
+        """Файл удаляется вместе с последним постом"""
+        first = self.create_post("one.gif")
+        second = self.create_post("two.gif")
+        name = first.image.name
+        storage = first.image.storage
+        first.delete()
+        self.assertTrue(storage.exists(name))
+        second.delete()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(ImageBlob.objects.filter(pk=name).exists())
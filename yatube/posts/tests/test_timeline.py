@@ -0,0 +1,84 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков автора"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text="test-fan-out")
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        response = self.reader_client.get(reverse("posts:follow_index"))
+        self.assertIn(post, response.context["page_obj"])
+
+    def test_follow_and_unfollow_update_timeline(self):
+        """Подписка дополняет ленту, отписка её очищает"""
+        Post.objects.create(author=self.author, text="test-before-follow")
+        self.reader_client.get(
+            reverse("posts:profile_follow", kwargs={"username": "author"})
+        )
+        self.assertEqual(self.reader.timeline.count(), 1)
+        self.reader_client.get(
+            reverse("posts:profile_unfollow", kwargs={"username": "author"})
+        )
+        self.assertEqual(self.reader.timeline.count(), 0)
+
+    def test_backfill_command_rebuilds_timelines(self):
+        """backfill_timelines восстанавливает ленты по таблице Follow"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.bulk_create(
+            Post(author=self.author, text="test-bulk" + str(i))
+            for i in range(3)
+        )
+        self.assertEqual(self.reader.timeline.count(), 0)
+        call_command("backfill_timelines", stdout=StringIO())
+        self.assertEqual(self.reader.timeline.count(), 3)
+        for entry in self.reader.timeline.select_related("post"):
+            self.assertEqual(entry.pub_date, entry.post.pub_date)
+
+    @override_settings(
+        CURSOR_PAGINATED_VIEWS=("follow_index",), DEFAULT_POSTS_ON_PAGE=2
+    )
+    def test_cursor_pages_of_timeline(self):
+        """Курсор ленты подписок листает посты по записям TimelineEntry"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [
+            Post.objects.create(author=self.author, text="test" + str(i))
+            for i in range(3)
+        ]
+        url = reverse("posts:follow_index")
+        first = self.reader_client.get(url).context["page_obj"]
+        self.assertEqual(list(first), posts[:2])
+        second = self.reader_client.get(
+            url, {"cursor": first.next_cursor()}
+        ).context["page_obj"]
+        self.assertEqual(list(second), posts[2:])
+        previous = self.reader_client.get(
+            url, {"cursor": second.previous_cursor()}
+        ).context["page_obj"]
+        self.assertEqual(list(previous), posts[:2])
+
+    @override_settings(FOLLOW_FEED_FANOUT=False)
+    def test_disabled_fanout_uses_follow_join(self):
+        """Без fan-out лента строится join через Follow"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text="test-join")
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertIn(post, timeline.follow_feed(self.reader))
@@ -0,0 +1,170 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from posts import search
+from posts.models import (
+    Comment,
+    Follow,
+    Group,
+    ImageBlob,
+    Post,
+    User,
+    UserStats,
+)
+from taskqueue import queue
+from taskqueue.models import Task
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        author = User.objects.create_user(
+            username="author", first_name="Имя", last_name="Фамилия"
+        )
+        reader = User.objects.create_user(username="reader")
+        group = Group.objects.create(
+            title="test-group", slug="test-slug", description="test"
+        )
+        cls.post = Post.objects.create(
+            author=author, text="Рецепт борща", group=group
+        )
+        Post.objects.create(author=reader, text="test-text")
+        Comment.objects.create(post=cls.post, author=reader, text="Вкусно")
+        Follow.objects.create(user=reader, author=author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def export(self, name):
+        path = os.path.join(self.directory, name)
+        call_command("export_posts", path, stdout=StringIO())
+        return path
+
+    def wipe(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def import_file(self, path, batch_size=1):
+        out = StringIO()
+        call_command("import_posts", path, batch_size=batch_size, stdout=out)
+        return out.getvalue()
+
+    def test_roundtrip_restores_content(self):
+        """Экспорт и импорт в пустую базу восстанавливают контент"""
+        for name in ("dump.ndjson", "dump.ndjson.gz"):
+            with self.subTest(name=name):
+                path = self.export(name)
+                self.wipe()
+                report = self.import_file(path)
+                self.assertIn("post: 2", report)
+                post = Post.objects.get(text="Рецепт борща")
+                self.assertEqual(post.author.get_full_name(), "Имя Фамилия")
+                self.assertEqual(post.group.slug, "test-slug")
+                self.assertEqual(post.pub_date, self.post.pub_date)
+                comment = post.comments.get()
+                self.assertEqual(comment.author.username, "reader")
+                self.assertTrue(
+                    Follow.objects.filter(
+                        user__username="reader", author__username="author"
+                    ).exists()
+                )
+                # Signals do not fire on bulk_create; counters and the
+                # search index are rebuilt after the import.
+                post.refresh_from_db()
+                self.assertEqual(post.comments_count, 1)
+                self.assertEqual(
+                    UserStats.objects.get(user=post.author).followers_count,
+                    1,
+                )
+                hits = search.get_engine().search("борща", 10)
+                self.assertEqual([hit.post_id for hit in hits], [post.pk])
+
+    def test_import_into_existing_data_remaps_keys(self):
+        """Повторный импорт сопоставляет людей и группы, посты добавляет"""
+        path = self.export("dump.ndjson")
+        report = self.import_file(path, batch_size=1000)
+        self.assertIn("user: 0", report)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 4)
+        copy = Post.objects.filter(text="Рецепт борща").latest("pk")
+        self.assertEqual(copy.comments.get().text, "Вкусно")
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_import_takes_image_refs(self):
+        """Импорт добавляет ссылки на картинки по числу постов"""
+        Post.objects.update(image="posts/shared.jpg")
+        path = self.export("images.ndjson")
+        self.wipe()
+        self.import_file(path)
+        self.assertEqual(ImageBlob.objects.get(pk="posts/shared.jpg").refs, 2)
+        self.import_file(path, batch_size=1000)
+        self.assertEqual(ImageBlob.objects.get(pk="posts/shared.jpg").refs, 4)
+
+    def write(self, name, records):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as stream:
+            for record in records:
+                stream.write(json.dumps(record) + "\n")
+        return path
+
+    def test_imported_user_can_reset_password(self):
+        """Импортированный аккаунт получает письмо сброса пароля"""
+        path = self.write(
+            "user.ndjson",
+            [{"model": "user", "username": "new", "email": "new@example.com"}],
+        )
+        self.import_file(path)
+        user = User.objects.get(username="new")
+        self.assertFalse(user.has_usable_password())
+        self.client.post(
+            reverse("users:password_reset_form"),
+            {"email": "new@example.com"},
+        )
+        self.assertEqual(Task.objects.count(), 1)
+        for item in queue.claim(10):
+            queue.execute(item)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["new@example.com"])
+
+    def test_duplicates_reported(self):
+        """Повторы в файле пропускаются, в отчёте — только вставленное"""
+        path = self.write(
+            "dupes.ndjson",
+            [
+                {"model": "user", "username": "new"},
+                {"model": "user", "username": "new"},
+                {"model": "follow", "user": "new", "author": "author"},
+                {"model": "follow", "user": "new", "author": "author"},
+                {"model": "follow", "user": "reader", "author": "author"},
+            ],
+        )
+        report = self.import_file(path, batch_size=1000)
+        self.assertIn("user: 1 (пропущено 1)", report)
+        self.assertIn("follow: 1 (пропущено 2)", report)
+        self.assertIn("Повторы в файле: user new", report)
+        self.assertEqual(Follow.objects.count(), 2)
+
+    def test_invalid_record_fails(self):
+        """Неизвестная модель останавливает импорт"""
+        path = os.path.join(self.directory, "bad.ndjson")
+        with open(path, "w") as stream:
+            stream.write('{"model": "session"}\n')
+        with self.assertRaises(CommandError):
+            self.import_file(path)
@@ -0,0 +1,156 @@
+import hashlib
+import shutil
+import struct
+import tempfile
+import zlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post, User
+from posts.uploads import ImageUploadHandler, RejectedUpload
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+def png_chunk(kind, data):
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data))
+    )
+
+
+def png_header(width, height):
+    """Заголовок PNG без пикселей: сигнатура, IHDR и пустой IDAT."""
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + png_chunk(b"IHDR", ihdr)
+        + png_chunk(b"IDAT", b"")
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, content, name="image.gif"):
+        return self.authorized_client.post(
+            reverse("posts:post_create"),
+            {
+                "text": "test-text",
+                "image": SimpleUploadedFile(name, content, "image/gif"),
+            },
+        )
+
+    def assertRejected(self, response, message):
+        self.assertFalse(Post.objects.exists())
+        self.assertIn(message, response.context["form"].errors["image"][0])
+
+    @override_settings(POST_IMAGE_MAX_SIZE=20)
+    def test_oversized_upload_rejected(self):
+        """Слишком большой файл отклоняется"""
+        self.assertRejected(self.upload(SMALL_GIF), "Картинка больше")
+
+    def test_not_an_image_rejected(self):
+        """Файл без сигнатуры картинки отклоняется"""
+        self.assertRejected(
+            self.upload(b"<html>" * 10), "Загрузите картинку в формате"
+        )
+
+    @override_settings(POST_IMAGE_MAX_DIMENSIONS=(1, 1))
+    def test_large_dimensions_rejected(self):
+        """Картинка больше допустимых размеров отклоняется"""
+        self.assertRejected(self.upload(SMALL_GIF), "пикселей")
+
+    def test_decompression_bomb_rejected(self):
+        """Картинка-бомба отклоняется по заголовку"""
+        self.assertRejected(
+            self.upload(png_header(100000, 100000), "bomb.png"), "пикселей"
+        )
+
+    def test_valid_image_accepted(self):
+        """Обычная картинка сохраняется"""
+        self.upload(SMALL_GIF)
+        self.assertTrue(Post.objects.exclude(image="").exists())
+
+    def test_edit_validates_upload(self):
+        """Картинка проверяется и при редактировании поста"""
+        post = Post.objects.create(author=self.user, text="test-text")
+        response = self.authorized_client.post(
+            reverse("posts:post_edit", kwargs={"pk": post.pk}),
+            {
+                "text": "test-text",
+                "image": SimpleUploadedFile("page.gif", b"<html>" * 10),
+            },
+        )
+        self.assertIn(
+            "Загрузите картинку в формате",
+            response.context["form"].errors["image"][0],
+        )
+
+    def test_csrf_checked_after_handler(self):
+        """Представление с обработчиком по-прежнему проверяет CSRF"""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            reverse("posts:post_create"), {"text": "test-text"}
+        )
+        self.assertTemplateUsed(response, "core/403csrf.html")
+        self.assertFalse(Post.objects.exists())
+
+    def test_handler_stops_passing_data(self):
+        """После отказа обработчик не передаёт данные дальше"""
+        handler = ImageUploadHandler()
+        handler.new_file("image", "bomb.png", "image/png", None)
+        header = png_header(100000, 100000)
+        self.assertIsNone(handler.receive_data_chunk(header, 0))
+        self.assertIsNone(handler.receive_data_chunk(b"\0" * 1024, 0))
+        upload = handler.file_complete(len(header) + 1024)
+        self.assertIsInstance(upload, RejectedUpload)
+        self.assertEqual(upload.size, 0)
+
+    def test_handler_hashes_accepted_upload(self):
+        """Принятый файл получает sha256, посчитанный при загрузке"""
+        request = RequestFactory().post(
+            "/", {"image": SimpleUploadedFile("image.gif", SMALL_GIF)}
+        )
+        request.upload_handlers.insert(0, ImageUploadHandler(request))
+        self.assertEqual(
+            request.FILES["image"].sha256,
+            hashlib.sha256(SMALL_GIF).hexdigest(),
+        )
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_extension_from_format(self):
+        """Одинаковые байты с разными расширениями — один файл"""
+        for name in ("photo.jpeg", "photo.JPG", "photo.gif"):
+            self.upload(SMALL_GIF, name)
+        digest = hashlib.sha256(SMALL_GIF).hexdigest()
+        self.assertEqual(
+            set(Post.objects.values_list("image", flat=True)),
+            {f"posts/{digest[:2]}/{digest}.gif"},
+        )
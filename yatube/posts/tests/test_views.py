@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -208,10 +209,8 @@ class PostModelTest(TestCase):
         response = self.guest_client.get(
             reverse("posts:group_list", kwargs={"slug": "test-slug2"})
         )
-        for i in range(0, len(response.context["post_list"])):
-            self.assertEqual(
-                str(response.context["post_list"][i].group), "test-group2"
-            )
+        for post in response.context["page_obj"]:
+            self.assertEqual(str(post.group), "test-group2")
 
     # check post with pic.uploaded can't many times.all test in one function
     def test_pages_show_correct_picture(self):
@@ -233,36 +232,30 @@ class PostModelTest(TestCase):
             "image": uploaded,
         }
 
+        # picture is stored under its content hash
+        digest = hashlib.sha256(small_gif).hexdigest()
+        image_name = f"posts/{digest[:2]}/{digest}.gif"
         # send POST with picture
         self.authorized_client.post(
             reverse("posts:post_create"), data=form_data, follow=True
         )
-        # check last post on home page
-        response = self.guest_client.get(reverse("posts:index"))
-        post_count = Post.objects.all().count()
-        first_object = response.context["post_list"][post_count - 1]
-        self.assertEqual(first_object.image, "posts/small.gif")
-        # check last post on group page test-group2
-        response = self.guest_client.get(
-            reverse("posts:group_list", kwargs={"slug": "test-slug2"})
-        )
-        post_count = Post.objects.filter(group=self.group2).count()
-        first_object = response.context["post_list"][post_count - 1]
-        self.assertEqual(first_object.image, "posts/small.gif")
-        # check last posts on profile page
-        response = self.guest_client.get(
-            reverse("posts:profile", kwargs={"username": "auth"})
-        )
-        post_count = Post.objects.filter(author=self.user).count()
-        first_object = response.context["post_list"][post_count - 1]
-        self.assertEqual(first_object.image, "posts/small.gif")
+        # check last post on every feed; out-of-range page gives the last
+        for url in (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": "test-slug2"}),
+            reverse("posts:profile", kwargs={"username": "auth"}),
+        ):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, {"page": 999})
+                last_object = response.context["page_obj"][-1]
+                self.assertEqual(last_object.image, image_name)
         # check last post on post_detail page
         post_count = Post.objects.all().count()
         response = self.guest_client.get(
             reverse("posts:post_detail", kwargs={"post_id": post_count})
         )
         first_object = response.context["post"]
-        self.assertEqual(first_object.image, "posts/small.gif")
+        self.assertEqual(first_object.image, image_name)
 
     # Check context post with comment
     def test_post_detail_page_show_comment_context(self):
@@ -276,15 +269,26 @@ class PostModelTest(TestCase):
 
     # test cache
     def test_cache_home_page(self):
-        """Тестируем удаление одной записи и отображение кеша"""
+        """Главная отдаётся из кеша, пока версия лент не изменилась"""
+        response_before = self.authorized_client.get(reverse("posts:index"))
+        # update() обходит сигналы и не меняет версию кеша
+        Post.objects.filter(pk=1).update(text="test-text-updated")
+        response_cached = self.authorized_client.get(reverse("posts:index"))
+        self.assertEqual(response_before.content, response_cached.content)
+
+    def test_cache_home_page_invalidated_on_delete(self):
+        """Удаление записи сразу сбрасывает кеш главной"""
         response_before_del = self.authorized_client.get(
             reverse("posts:index")
         )
-        content_before_del = response_before_del.content
         Post.objects.get(pk=1).delete()
         response_after_del = self.authorized_client.get(reverse("posts:index"))
-        content_after_del = response_after_del.content
-        self.assertEqual(content_before_del, content_after_del)
+        self.assertNotEqual(
+            response_before_del.content, response_after_del.content
+        )
+        self.assertNotIn(
+            "test-text1\n", response_after_del.content.decode()
+        )
 
     # test 404 custom page
     def test_castom_page_not_found(self):
@@ -355,3 +359,52 @@ class PostModelTest(TestCase):
             reverse("posts:follow_index")
         )
         self.assertNotIn("test-text", response_after_follow3.content.decode())
+
+
+@override_settings(COMMENTS_ON_PAGE=3)
+class CommentsPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="auth")
+        cls.post = Post.objects.create(author=cls.user, text="test-text")
+        for i in range(5):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f"test-comment{i}"
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_post_detail_shows_first_page(self):
+        """post_detail показывает первую страницу комментариев"""
+        response = self.guest_client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        )
+        comments = response.context["comments"]
+        self.assertEqual(
+            [comment.text for comment in comments],
+            ["test-comment0", "test-comment1", "test-comment2"],
+        )
+        self.assertTrue(comments.has_next())
+        self.assertContains(
+            response,
+            reverse("posts:post_comments", kwargs={"post_id": self.post.pk}),
+        )
+
+    def test_more_comments_fragment(self):
+        """post_comments отдаёт следующую страницу фрагментом"""
+        first = self.guest_client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        )
+        response = self.guest_client.get(
+            reverse("posts:post_comments", kwargs={"post_id": self.post.pk}),
+            {"comments": first.context["comments"].next_cursor()},
+        )
+        self.assertTemplateUsed(response, "posts/includes/comment_list.html")
+        self.assertTemplateNotUsed(response, "base.html")
+        self.assertEqual(
+            [comment.text for comment in response.context["comments"]],
+            ["test-comment3", "test-comment4"],
+        )
+        self.assertNotContains(response, "Показать ещё")
@@ -0,0 +1,154 @@
+"""Миниатюры и адаптивные варианты картинок постов, построенные заранее.
+
+Размеры перечислены в POST_THUMBNAILS, ширины и форматы для <picture> —
+в POST_IMAGE_WIDTHS и POST_IMAGE_FORMATS. Всё строится после сохранения
+поста задачей posts.tasks.generate_thumbnails в воркере очереди.
+Шаблоны ({% post_thumbnail %}, {% post_picture %}) берут готовые
+миниатюры из хранилища ключей sorl-thumbnail, а варианты — из
+Post.image_variants, и никогда не открывают оригинал и не обращаются
+к хранилищу файлов.
+"""
+import hashlib
+import io
+import json
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.parsers import parse_geometry
+
+from . import cache, profiles
+from .models import ImageBlob, Post
+
+
+class PrebuiltThumbnailBackend(ThumbnailBackend):
+    def get_prebuilt(self, file_, geometry_string, **options):
+        """Готовая миниатюра или None; оригинал не открывается."""
+        source = ImageFile(file_)
+        # Same option defaults as get_thumbnail(), so the names match.
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = PrebuiltThumbnailBackend()
+
+
+def image_storage():
+    # Variants go to default_storage: they have fixed, derived names.
+    return Post._meta.get_field("image").storage
+
+
+def get(image, alias):
+    geometry, options = settings.POST_THUMBNAILS[alias]
+    return backend.get_prebuilt(image, geometry, **options)
+
+
+def modern_formats():
+    """Форматы из POST_IMAGE_FORMATS, которые умеет сохранять Pillow."""
+    Image.init()
+    return [
+        fmt for fmt in settings.POST_IMAGE_FORMATS if fmt.upper() in Image.SAVE
+    ]
+
+
+def build_variants(name):
+    """Сохраняет картинку name во всех ширинах и форматах.
+
+    Кадр такой же, как у миниатюры "card". Возвращает описание вариантов
+    для Post.image_variants.
+    """
+    card_width, card_height = parse_geometry(
+        settings.POST_THUMBNAILS["card"][0]
+    )
+    prefix = "posts/variants/" + hashlib.md5(name.encode()).hexdigest()[:12]
+    with image_storage().open(name) as source:
+        image = Image.open(source)
+        image.load()
+    source_format = image.format.lower()
+    variants = []
+    for fmt in [source_format] + modern_formats():
+        for width in settings.POST_IMAGE_WIDTHS:
+            height = round(width * card_height / card_width)
+            variant_name = f"{prefix}/{width}.{fmt}"
+            if not default_storage.exists(variant_name):
+                resized = ImageOps.fit(image, (width, height))
+                if fmt != source_format and resized.mode != "RGBA":
+                    resized = resized.convert("RGBA")
+                buffer = io.BytesIO()
+                resized.save(buffer, fmt.upper())
+                default_storage.save(
+                    variant_name, ContentFile(buffer.getvalue())
+                )
+            variants.append(
+                {
+                    "format": fmt,
+                    "width": width,
+                    "height": height,
+                    "name": variant_name,
+                }
+            )
+    return {"source": name, "variants": variants}
+
+
+def sources(post):
+    """<source> для <picture>: тип и srcset, современные форматы первыми.
+
+    Пустой список, пока варианты для текущей картинки не построены.
+    """
+    if not post.image or not post.image_variants:
+        return []
+    data = json.loads(post.image_variants)
+    if data["source"] != post.image.name:
+        return []
+    srcsets = {}
+    for variant in data["variants"]:
+        srcsets.setdefault(variant["format"], []).append(
+            f"{default_storage.url(variant['name'])} {variant['width']}w"
+        )
+    # Source format last: it is what browsers without WebP/AVIF get.
+    modern = modern_formats()
+    ordered = sorted(srcsets, key=lambda fmt: fmt not in modern)
+    return [
+        {"type": f"image/{fmt}", "srcset": ", ".join(srcsets[fmt])}
+        for fmt in ordered
+    ]
+
+
+def generate(name, force=False):
+    """Строит миниатюры и варианты картинки name для всех её постов.
+
+    Для уже обработанного файла (ImageBlob.variants) картинка не
+    открывается: посты только получают готовое описание вариантов.
+    """
+    variants = (
+        ImageBlob.objects.filter(pk=name)
+        .values_list("variants", flat=True)
+        .first()
+    )
+    if force or not variants:
+        for geometry, options in settings.POST_THUMBNAILS.values():
+            backend.get_thumbnail(
+                ImageFile(name, image_storage()), geometry, **options
+            )
+        variants = json.dumps(build_variants(name))
+        ImageBlob.objects.filter(pk=name).update(variants=variants)
+    posts = Post.objects.filter(image=name).exclude(image_variants=variants)
+    authors = list(posts.values_list("author_id", flat=True))
+    if posts.update(image_variants=variants):
+        # update() sends no signals; cached feeds still have the old markup.
+        cache.bump_version()
+        profiles.bump_author(*authors)
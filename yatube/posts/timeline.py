@@ -0,0 +1,108 @@
+"""Материализованная лента подписок: пост раскладывается подписчикам при
+сохранении, а follow_index читает готовые записи по индексу
+(user, pub_date, post).
+"""
+from django.conf import settings
+from django.db import transaction
+
+from . import follow_graph
+from .models import FEED_FIELDS, Follow, Post, TimelineEntry
+from .paginators import TimelineCursorPaginator, TimelinePaginator
+from .utils import get_page
+
+
+def is_enabled():
+    return settings.FOLLOW_FEED_FANOUT
+
+
+def follow_feed(user):
+    """Лента user: записи TimelineEntry с постами в порядке индекса
+    (user, pub_date, post), а без fan-out — посты авторов из подписок."""
+    if is_enabled():
+        return (
+            TimelineEntry.objects.filter(user=user)
+            .select_related("post__author", "post__group")
+            .only("pub_date", "post", *("post__" + f for f in FEED_FIELDS))
+            .order_by("pub_date", "post_id")
+        )
+    return Post.objects.feed().filter(
+        author__in=list(follow_graph.following(user.pk))
+    )
+
+
+def get_feed_page(request, user):
+    """Страница ленты подписок; на странице всегда посты."""
+    feed = follow_feed(user)
+    if not is_enabled():
+        return get_page(request, feed, "follow_index")
+    return get_page(
+        request,
+        feed,
+        "follow_index",
+        paginator_class=TimelinePaginator,
+        cursor_paginator_class=TimelineCursorPaginator,
+    )
+
+
+def fan_out_post(post):
+    follower_ids = Follow.objects.filter(author=post.author_id).values_list(
+        "user_id", flat=True
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=pk, post=post, pub_date=post.pub_date)
+            for pk in follower_ids
+        ],
+        batch_size=settings.FOLLOW_FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def add_author(user_id, author_id):
+    posts = Post.objects.filter(author=author_id).values_list("pk", "pub_date")
+    entries = TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        ],
+        batch_size=settings.FOLLOW_FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(entries)
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user=user_id, post__author=author_id
+    ).delete()
+
+
+def backfill(user_ids=None):
+    """Перестраивает ленты с нуля; возвращает число записей."""
+    follows = Follow.objects.all()
+    entries = TimelineEntry.objects.all()
+    if user_ids is not None:
+        follows = follows.filter(user__in=user_ids)
+        entries = entries.filter(user__in=user_ids)
+    # One row per (follower, post of a followed author), read as a join.
+    rows = (
+        follows.filter(author__posts__isnull=False)
+        .values_list("user_id", "author__posts__pk", "author__posts__pub_date")
+        .order_by()
+        .iterator()
+    )
+    created = 0
+    with transaction.atomic():
+        entries.delete()
+        batch = []
+        for user_id, post_id, pub_date in rows:
+            batch.append(TimelineEntry(
+                user_id=user_id, post_id=post_id, pub_date=pub_date
+            ))
+            if len(batch) == settings.FOLLOW_FEED_BATCH_SIZE:
+                TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+                created += len(batch)
+                batch = []
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+    return created
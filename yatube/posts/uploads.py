@@ -0,0 +1,187 @@
+"""Проверка загружаемых картинок по мере поступления данных.
+
+ImageUploadHandler ставится первым обработчиком загрузки только в
+представлениях с декоратором validate_image_uploads и проверяет
+размер, сигнатуру формата и размеры в пикселях на каждом куске. Как
+только загрузка нарушает ограничения, остальные куски отбрасываются —
+не попадают ни в память, ни во временный файл, — а форма получает
+RejectedUpload с причиной. PostForm проверяет картинку через
+validate_image_upload() до того, как ImageField откроет её Pillow.
+Принятому файлу обработчик добавляет sha256 содержимого, посчитанный по
+тем же кускам: ContentAddressedStorage не читает файл ещё раз.
+"""
+import hashlib
+from functools import wraps
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+# Format signatures: name and (offset, bytes) parts that must all match.
+SIGNATURES = (
+    ("JPEG", ((0, b"\xff\xd8\xff"),)),
+    ("PNG", ((0, b"\x89PNG\r\n\x1a\n"),)),
+    ("GIF", ((0, b"GIF87a"),)),
+    ("GIF", ((0, b"GIF89a"),)),
+    ("WEBP", ((0, b"RIFF"), (8, b"WEBP"))),
+)
+FORMATS = tuple(dict.fromkeys(name for name, _ in SIGNATURES))
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "GIF": ".gif", "WEBP": ".webp"}
+SIGNATURE_SIZE = 12
+# The header (magic bytes, dimensions) must arrive within this many bytes.
+HEADER_LIMIT = 256 * 1024
+
+
+def detect_format(header):
+    for name, parts in SIGNATURES:
+        if all(
+            header[offset:offset + len(magic)] == magic
+            for offset, magic in parts
+        ):
+            return name
+    return None
+
+
+def too_large():
+    return forms.ValidationError(
+        "Картинка больше %s" % filesizeformat(settings.POST_IMAGE_MAX_SIZE)
+    )
+
+
+class ImageSniffer:
+    """Проверяет картинку кусками; нарушение — ValidationError.
+
+    Копит только заголовок и читает из него размеры через Image.open(),
+    который не декодирует и не выделяет память под пиксели.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.header = b""
+        self.format = None
+        self.dimensions = None
+
+    def feed(self, chunk):
+        self.size += len(chunk)
+        if self.size > settings.POST_IMAGE_MAX_SIZE:
+            raise too_large()
+        if self.dimensions is not None:
+            return
+        self.header += chunk[:HEADER_LIMIT - len(self.header)]
+        if self.format is None:
+            if len(self.header) < SIGNATURE_SIZE:
+                return
+            self.format = detect_format(self.header)
+            if self.format is None:
+                raise forms.ValidationError(
+                    "Загрузите картинку в формате %s" % ", ".join(FORMATS)
+                )
+        try:
+            with Image.open(BytesIO(self.header)) as image:
+                self.dimensions = image.size
+        except Image.DecompressionBombError:
+            self.dimensions = (float("inf"), float("inf"))
+        except OSError:
+            # Header not complete yet.
+            if len(self.header) >= HEADER_LIMIT:
+                raise forms.ValidationError("Файл не похож на картинку")
+            return
+        self.check_dimensions()
+
+    def check_dimensions(self):
+        max_width, max_height = settings.POST_IMAGE_MAX_DIMENSIONS
+        width, height = self.dimensions
+        if width > max_width or height > max_height:
+            raise forms.ValidationError(
+                f"Картинка больше {max_width}x{max_height} пикселей"
+            )
+
+    def close(self):
+        if self.dimensions is None:
+            raise forms.ValidationError("Файл не похож на картинку")
+
+
+def validate_image_upload(upload):
+    """Те же проверки для файла, уже принятого без ImageUploadHandler."""
+    if isinstance(upload, RejectedUpload):
+        raise upload.error
+    if (upload.size or 0) > settings.POST_IMAGE_MAX_SIZE:
+        raise too_large()
+    sniffer = ImageSniffer()
+    try:
+        for chunk in upload.chunks():
+            sniffer.feed(chunk)
+            if sniffer.dimensions is not None:
+                break
+    finally:
+        upload.seek(0)
+    sniffer.close()
+
+
+class RejectedUpload(UploadedFile):
+    """Отклонённая при загрузке картинка: без содержимого, с причиной."""
+
+    def __init__(self, name, content_type, error):
+        super().__init__(BytesIO(), name, content_type, 0)
+        self.error = error
+
+
+class ImageUploadHandler(FileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sniffer = ImageSniffer()
+        self.digest = hashlib.sha256()
+        self.error = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error is not None:
+            return None
+        try:
+            self.sniffer.feed(raw_data)
+        except forms.ValidationError as error:
+            self.error = error
+            return None
+        self.digest.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.error is None:
+            try:
+                self.sniffer.close()
+            except forms.ValidationError as error:
+                self.error = error
+        if self.error is not None:
+            return RejectedUpload(
+                self.file_name, self.content_type, self.error
+            )
+        # The parser stops at the first handler that returns a file, so
+        # the next handlers are asked here and their file gets the hash.
+        handlers = self.request.upload_handlers if self.request else [self]
+        for handler in handlers[handlers.index(self) + 1:]:
+            upload = handler.file_complete(file_size)
+            if upload is not None:
+                upload.sha256 = self.digest.hexdigest()
+                return upload
+        return None
+
+
+def validate_image_uploads(view):
+    """Ставит ImageUploadHandler первым обработчиком загрузки view.
+
+    Обработчики можно менять, пока тело запроса не прочитано, а
+    CsrfViewMiddleware читает request.POST ещё до вызова view. Поэтому
+    проверка CSRF переносится внутрь: после вставки обработчика.
+    """
+    protected = csrf_protect(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers.insert(0, ImageUploadHandler(request))
+        return protected(request, *args, **kwargs)
+
+    return csrf_exempt(wrapper)
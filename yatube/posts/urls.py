@@ -8,6 +8,8 @@ app_name = "posts"
 urlpatterns = [
     # Главная страница
     path("", views.index, name="index"),
+    # Полнотекстовый поиск
+    path("search/", views.search_posts, name="search"),
     # Отдельная страница с информацией о group
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
     # Профайл пользователя
@@ -20,6 +22,12 @@ urlpatterns = [
     path(
         "posts/<int:post_id>/comment/", views.add_comment, name="add_comment"
     ),
+    # Следующие страницы комментариев
+    path(
+        "posts/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments",
+    ),
     path("follow/", views.follow_index, name="follow_index"),
     path(
         "profile/<str:username>/follow/",
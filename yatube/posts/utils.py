@@ -0,0 +1,67 @@
+import math
+
+from django.conf import settings
+from django.core.paginator import Paginator
+
+from .models import Comment, Post
+from .paginators import CursorPaginator, InvalidCursor, encode_token
+
+
+def get_page(
+    request,
+    queryset,
+    view_name,
+    paginator_class=Paginator,
+    cursor_paginator_class=CursorPaginator,
+):
+    """Возвращает страницу ленты, курсорную или обычную по настройкам."""
+    if view_name in settings.CURSOR_PAGINATED_VIEWS:
+        paginator = cursor_paginator_class(
+            queryset, settings.DEFAULT_POSTS_ON_PAGE
+        )
+        return paginator.get_page(request.GET.get("cursor"))
+    paginator = paginator_class(queryset, settings.DEFAULT_POSTS_ON_PAGE)
+    return paginator.get_page(request.GET.get("page"))
+
+
+def page_cache_key(request, view_name, count):
+    """Часть ключа кэша, задающая страницу ленты из count постов.
+
+    Берутся только ?page= или ?cursor=, приведённые к тому, что откроет
+    get_page(): номер в пределах числа страниц или разобранный курсор.
+    Прочие параметры и мусор в запросе не плодят записи в кэше.
+    """
+    if view_name in settings.CURSOR_PAGINATED_VIEWS:
+        paginator = CursorPaginator(Post.objects.none(), 1)
+        try:
+            direction, values = paginator.decode_cursor(
+                request.GET.get("cursor", "")
+            )
+        except InvalidCursor:
+            return "cursor:"
+        return "cursor:" + encode_token(
+            direction,
+            [v.isoformat() if hasattr(v, "isoformat") else v for v in values],
+        )
+    pages = max(1, math.ceil(count / settings.DEFAULT_POSTS_ON_PAGE))
+    try:
+        number = int(request.GET.get("page", 1))
+    except ValueError:
+        number = 1
+    return "page:%d" % min(max(number, 1), pages)
+
+
+def get_comments_page(request, post_id):
+    """Страница комментариев поста по курсору ?comments= вместе с авторами.
+
+    Общее число берётся из счётчика Post.comments_count, без COUNT(*).
+    """
+    comments = (
+        Comment.objects.filter(post=post_id)
+        .select_related("author")
+        .only("text", "created", "post_id", "author__username")
+    )
+    paginator = CursorPaginator(
+        comments, settings.COMMENTS_ON_PAGE, ordering=("created", "pk")
+    )
+    return paginator.get_page(request.GET.get("comments"))
@@ -1,94 +1,128 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import condition
+
+from core.routers import use_primary
 
 from .forms import PostForm, CommentForm
-from .models import Group, Post, Comment, Follow
+from .models import Group, Post, Follow
+from . import (
+    conditional,
+    counters,
+    profiles,
+    recommendations,
+    search,
+    timeline,
+)
+from .paginators import SearchPaginator
+from .uploads import validate_image_uploads
+from .utils import get_comments_page, get_page, page_cache_key
 
 User = get_user_model()
 
 
 def index(request):
-    post_list = Post.objects.all()
+    post_list = Post.objects.feed()
     title = "Последние обновления на сайте"
-    paginator = Paginator(post_list, settings.DEFAULT_POSTS_ON_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_page(request, post_list, "index")
 
     context = {
         "page_obj": page_obj,
         "title": title,
-        "post_list": post_list,
     }
     return render(request, "posts/index.html", context)
 
 
+def search_posts(request):
+    query = request.GET.get("q", "").strip()
+    paginator = SearchPaginator(
+        search.get_engine(),
+        query,
+        settings.DEFAULT_POSTS_ON_PAGE,
+        Post.objects.feed(),
+    )
+    page_obj = paginator.get_page(request.GET.get("cursor"))
+    context = {
+        "page_obj": page_obj,
+        "title": "Поиск",
+        "q": query,
+    }
+    return render(request, "posts/search.html", context)
+
+
+@condition(etag_func=conditional.group_posts_etag)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = Post.objects.filter(group=group)
-    paginator = Paginator(post_list, settings.DEFAULT_POSTS_ON_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.feed().filter(group=group)
+    page_obj = get_page(request, post_list, "group_posts")
     title = group.title
     description = group.description
     context = {
         "page_obj": page_obj,
         "title": title,
         "description": description,
-        "post_list": post_list,
     }
     return render(request, "posts/group_list.html", context)
 
 
+@condition(etag_func=conditional.profile_etag)
 def profile(request, username):
-    author = User.objects.get(username=username)
-    post_list = Post.objects.filter(author=author)
-    author_name = username
-    post_all = Post.objects.filter(author=author).count()
-    paginator = Paginator(post_list, settings.DEFAULT_POSTS_ON_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
-    if request.user.is_anonymous:
-        following = False
-    else:
-        try:
-            Follow.objects.get(user=request.user, author=author)
-        except Follow.DoesNotExist:
-            following = False
-        else:
-            following = True
-
+    profile = profiles.get_header(username)
+    if profile is None:
+        raise Http404("Нет такого пользователя")
+    post_list = Post.objects.feed().filter(author=profile["id"])
+    # Evaluated only when the cached page fragment is missing.
+    page_obj = SimpleLazyObject(
+        lambda: get_page(request, post_list, "profile")
+    )
     context = {
         "page_obj": page_obj,
-        "post_list": post_list,
-        "post_all": post_all,
-        "author_name": author_name,
-        "author": author,
-        "following": following,
+        "page_key": page_cache_key(
+            request, "profile", profile["posts_count"]
+        ),
+        "profile": profile,
+        "post_all": profile["posts_count"],
+        "author_name": username,
+        "author": SimpleLazyObject(
+            lambda: User.objects.get(pk=profile["id"])
+        ),
+        "following": profiles.is_following(request.user, profile["id"]),
     }
     return render(request, "posts/profile.html", context)
 
 
+@condition(etag_func=conditional.post_detail_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    author = post.author
-    post_list = Post.objects.all()
-    post_all = Post.objects.filter(author=author)
+    post = get_object_or_404(Post.objects.feed(), pk=post_id)
+    post_all = counters.user_stats(post.author).posts_count
     form = CommentForm()
-    comments = Comment.objects.filter(post=post_id)
     context = {
         "post": post,
         "post_all": post_all,
-        "post_list": post_list,
-        "comments": comments,
+        "comments": get_comments_page(request, post_id),
         "form": form,
     }
     return render(request, "posts/post_detail.html", context)
 
 
+@condition(etag_func=conditional.post_detail_etag)
+def post_comments(request, post_id):
+    # Следующая страница комментариев фрагментом HTML для "Показать ещё"
+    post = get_object_or_404(Post.objects.only("pk"), pk=post_id)
+    context = {
+        "post": post,
+        "comments": get_comments_page(request, post_id),
+    }
+    return render(request, "posts/includes/comment_list.html", context)
+
+
+@use_primary
 @login_required
+@validate_image_uploads
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
@@ -99,7 +133,9 @@ def post_create(request):
     return render(request, "posts/create_post.html", {"form": form})
 
 
+@use_primary
 @login_required
+@validate_image_uploads
 def post_edit(request, pk):
     post = get_object_or_404(Post, pk=pk)
     if post.author != request.user:
@@ -119,6 +155,7 @@ def post_edit(request, pk):
     return render(request, "posts/create_post.html", context)
 
 
+@use_primary
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -134,19 +171,20 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     # информация о текущем пользователе доступна в переменной request.user
-    posts = Post.objects.filter(author__following__user=request.user)
     title = "Посты на которые вы подписаны"
-    paginator = Paginator(posts, settings.DEFAULT_POSTS_ON_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = timeline.get_feed_page(request, request.user)
 
     context = {
         "page_obj": page_obj,
         "title": title,
+        "recommendations": recommendations.for_user(
+            request.user, settings.RECOMMENDATIONS_SHOWN
+        ),
     }
     return render(request, "posts/follow.html", context)
 
 
+@use_primary
 @login_required
 def profile_follow(request, username):
     # Подписаться на автора
@@ -157,10 +195,10 @@ def profile_follow(request, username):
     return redirect("posts:profile", username)
 
 
+@use_primary
 @login_required
 def profile_unfollow(request, username):
     # Дизлайк, отписка
     author = get_object_or_404(User, username=username)
-    follow_obj = Follow.objects.get(user=request.user, author=author)
-    follow_obj.delete()
+    Follow.objects.filter(user=request.user, author=author).delete()
     return redirect("posts:profile", username)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class TaskQueueConfig(AppConfig):
+    name = "taskqueue"
+
+    def ready(self):
+        # Register @task functions from every app's tasks.py.
+        autodiscover_modules("tasks")
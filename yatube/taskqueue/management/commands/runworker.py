@@ -0,0 +1,66 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from taskqueue import queue
+
+
+def run(item):
+    try:
+        return queue.execute(item)
+    finally:
+        # Each pool thread holds its own connection.
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Выполняет задачи из очереди taskqueue в пуле потоков"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.TASKS_WORKERS,
+            help="число потоков",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=settings.TASKS_POLL_INTERVAL,
+            help="пауза между опросами пустой очереди, секунд",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="выполнить готовые задачи и выйти",
+        )
+
+    def handle(self, *args, **options):
+        done, failed = self.work(options)
+        self.stdout.write(
+            self.style.SUCCESS(f"Выполнено: {done}, с ошибкой: {failed}")
+        )
+
+    def work(self, options):
+        done = failed = 0
+        with ThreadPoolExecutor(options["workers"]) as pool:
+            while True:
+                queue.requeue_stale()
+                if not options["once"]:
+                    queue.schedule_periodic()
+                items = queue.claim(options["workers"])
+                if not items:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll"])
+                    continue
+                finished, _ = wait([pool.submit(run, item) for item in items])
+                for future in finished:
+                    if future.result():
+                        done += 1
+                    else:
+                        failed += 1
+        return done, failed
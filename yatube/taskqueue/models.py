@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DEAD = "dead"
+    STATUSES = (
+        (QUEUED, "в очереди"),
+        (RUNNING, "выполняется"),
+        (DEAD, "не выполнена"),
+    )
+
+    name = models.CharField("задача", max_length=200)
+    # JSON: {"args": [...], "kwargs": {...}}
+    arguments = models.TextField("аргументы", default="{}")
+    status = models.CharField(
+        "статус", max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveIntegerField("попыток", default=0)
+    run_at = models.DateTimeField("запустить после", default=timezone.now)
+    locked_at = models.DateTimeField("взята воркером", null=True, blank=True)
+    last_error = models.TextField("последняя ошибка", blank=True)
+    created = models.DateTimeField("создана", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Задача"
+        verbose_name_plural = "Задачи"
+        indexes = [
+            models.Index(
+                fields=["status", "run_at"], name="task_status_run_at_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,125 @@
+"""Очередь фоновых задач в базе данных.
+
+Функция, помеченная @task, получает .delay(*args, **kwargs): вызов
+сохраняется строкой Task в той же транзакции, что и данные запроса, и
+выполняется воркером manage.py runworker. Неудачные попытки повторяются
+с экспоненциальной задержкой; после TASKS_MAX_ATTEMPTS задача остаётся
+в таблице со статусом dead. TASKS_ALWAYS_EAGER выполняет задачи сразу.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from core.routers import primary
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func):
+    """Регистрирует функцию как задачу и добавляет ей .delay()."""
+    name = f"{func.__module__}.{func.__name__}"
+    registry[name] = func
+    func.task_name = name
+    func.delay = lambda *args, **kwargs: enqueue(name, *args, **kwargs)
+    return func
+
+
+def enqueue(name, *args, **kwargs):
+    if name not in registry:
+        raise KeyError(f"Неизвестная задача: {name}")
+    if settings.TASKS_ALWAYS_EAGER:
+        with primary():
+            registry[name](*args, **kwargs)
+        return None
+    return Task.objects.create(
+        name=name, arguments=json.dumps({"args": args, "kwargs": kwargs})
+    )
+
+
+def claim(limit):
+    """Забирает до limit готовых задач; каждую получает один воркер."""
+    now = timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=now
+    ).order_by("run_at", "pk")[:limit]
+    claimed = []
+    for pk in candidates.values_list("pk", flat=True):
+        # The status filter makes the update a compare-and-swap.
+        if Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING, locked_at=now, attempts=F("attempts") + 1
+        ):
+            claimed.append(pk)
+    return list(Task.objects.filter(pk__in=claimed).order_by("run_at", "pk"))
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def execute(item):
+    """Выполняет задачу; успешная удаляется, упавшая — повтор или dead."""
+    try:
+        arguments = json.loads(item.arguments)
+        # Задачи читают только что записанное: реплики могут отставать.
+        with primary():
+            registry[item.name](
+                *arguments.get("args", ()), **arguments.get("kwargs", {})
+            )
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Задача %s упала:\n%s", item, error)
+        if item.attempts >= settings.TASKS_MAX_ATTEMPTS:
+            changes = {"status": Task.DEAD}
+        else:
+            changes = {
+                "status": Task.QUEUED,
+                "run_at": timezone.now() + retry_delay(item.attempts),
+            }
+        Task.objects.filter(pk=item.pk).update(
+            locked_at=None, last_error=error, **changes
+        )
+        return False
+    else:
+        Task.objects.filter(pk=item.pk).delete()
+        return True
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи воркеров, которые не дожили до конца.
+
+    Задача, исчерпавшая TASKS_MAX_ATTEMPTS, становится dead: иначе задача,
+    роняющая воркер, повторялась бы бесконечно. Возвращает число
+    задач, вернувшихся в очередь.
+    """
+    deadline = timezone.now() - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)
+    stale = Task.objects.filter(status=Task.RUNNING, locked_at__lt=deadline)
+    dead = stale.filter(attempts__gte=settings.TASKS_MAX_ATTEMPTS).update(
+        status=Task.DEAD,
+        locked_at=None,
+        last_error="Воркер не завершил задачу",
+    )
+    if dead:
+        logger.warning("Задач без живого воркера стало dead: %d", dead)
+    return stale.update(status=Task.QUEUED, locked_at=None)
+
+
+def schedule_periodic():
+    """Ставит задачи из TASKS_PERIODIC, если их ещё нет в очереди."""
+    for name, interval in settings.TASKS_PERIODIC.items():
+        pending = Task.objects.filter(
+            name=name, status__in=(Task.QUEUED, Task.RUNNING)
+        )
+        if not pending.exists():
+            Task.objects.create(
+                name=name,
+                run_at=timezone.now() + timedelta(seconds=interval),
+            )
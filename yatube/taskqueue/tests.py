@@ -0,0 +1,143 @@
+import re
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from posts.models import User
+
+from . import queue
+from .models import Task
+
+calls = []
+
+
+@queue.task
+def record(value):
+    calls.append(value)
+
+
+@queue.task
+def explode():
+    raise ValueError("boom")
+
+
+class QueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_ready(self):
+        for item in queue.claim(10):
+            queue.execute(item)
+
+    def test_delay_stores_task(self):
+        """delay() сохраняет задачу, выполняет её воркер"""
+        record.delay(1)
+        self.assertEqual(calls, [])
+        task = Task.objects.get()
+        self.assertEqual(task.name, "taskqueue.tests.record")
+        self.run_ready()
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_mode(self):
+        """TASKS_ALWAYS_EAGER выполняет задачу сразу"""
+        record.delay(2)
+        self.assertEqual(calls, [2])
+        self.assertFalse(Task.objects.exists())
+
+    def test_claimed_task_is_not_claimed_again(self):
+        """Взятую задачу не получит другой воркер"""
+        record.delay(3)
+        self.assertEqual(len(queue.claim(10)), 1)
+        self.assertEqual(queue.claim(10), [])
+
+    @override_settings(TASKS_MAX_ATTEMPTS=2, TASKS_RETRY_DELAY=10)
+    def test_retry_then_dead_letter(self):
+        """Упавшая задача повторяется с задержкой, потом становится dead"""
+        explode.delay()
+        with self.assertLogs("taskqueue.queue", "WARNING"):
+            self.run_ready()
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertIn("boom", task.last_error)
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs("taskqueue.queue", "WARNING"):
+            self.run_ready()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DEAD)
+        self.assertEqual(task.attempts, 2)
+        self.assertEqual(queue.claim(10), [])
+
+    @override_settings(TASKS_LOCK_TIMEOUT=60)
+    def test_stale_task_requeued(self):
+        """Задача упавшего воркера возвращается в очередь"""
+        record.delay(4)
+        queue.claim(10)
+        Task.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(queue.requeue_stale(), 1)
+        self.run_ready()
+        self.assertEqual(calls, [4])
+
+    @override_settings(TASKS_LOCK_TIMEOUT=60, TASKS_MAX_ATTEMPTS=2)
+    def test_stale_task_dead_after_max_attempts(self):
+        """Задача, которая каждый раз роняет воркер, становится dead"""
+        record.delay(5)
+        queue.claim(10)
+        Task.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(queue.requeue_stale(), 1)
+        queue.claim(10)
+        Task.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+        with self.assertLogs("taskqueue.queue", "WARNING"):
+            self.assertEqual(queue.requeue_stale(), 0)
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.DEAD)
+        self.assertEqual(task.attempts, 2)
+        self.assertEqual(queue.claim(10), [])
+        self.assertEqual(calls, [])
+
+    @override_settings(TASKS_PERIODIC={"taskqueue.tests.record": 60})
+    def test_periodic_scheduled_once(self):
+        """Периодическая задача ставится, только если её нет в очереди"""
+        queue.schedule_periodic()
+        queue.schedule_periodic()
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_password_reset_email_queued(self):
+        """Письмо сброса пароля отправляет воркер, а не запрос"""
+        User.objects.create_user(
+            username="auth", email="auth@example.com", password="secret"
+        )
+        Client().post(
+            reverse("users:password_reset_form"),
+            {"email": "auth@example.com"},
+        )
+        self.assertEqual(mail.outbox, [])
+        arguments = Task.objects.get().arguments
+        self.assertNotIn("http", arguments)
+        self.assertNotIn("auth@example.com", arguments)
+        self.run_ready()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["auth@example.com"])
+        link = re.search(r"http://testserver(\S+)", mail.outbox[0].body)
+        response = Client().get(link.group(1), follow=True)
+        self.assertTrue(response.context["validlink"])
+
+
+class RunWorkerTest(TransactionTestCase):
+    def test_runworker_once(self):
+        """runworker --once выполняет готовые задачи и выходит"""
+        calls.clear()
+        record.delay(5)
+        explode.delay()
+        out = StringIO()
+        with self.assertLogs("taskqueue.queue", "WARNING"):
+            call_command("runworker", once=True, workers=2, stdout=out)
+        self.assertEqual(calls, [5])
+        self.assertIn("Выполнено: 1, с ошибкой: 1", out.getvalue())
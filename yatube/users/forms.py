@@ -1,5 +1,10 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+from django.contrib.sites.shortcuts import get_current_site
+
+from posts.transfer import IMPORTED_PASSWORD
+
+from .tasks import send_password_reset
 
 User = get_user_model()
 
@@ -8,3 +13,56 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ("first_name", "last_name", "username", "email")
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """В очередь уходит только id пользователя; токен и письмо
+    собирает воркер."""
+
+    def get_users(self, email):
+        """Как в PasswordResetForm, плюс импортированные аккаунты:
+        пароль у них непригоден, войти можно только через сброс."""
+        users = User._default_manager.filter(
+            **{
+                "%s__iexact" % User.get_email_field_name(): email,
+                "is_active": True,
+            }
+        )
+        return (
+            user
+            for user in users
+            if user.has_usable_password() or user.password == IMPORTED_PASSWORD
+        )
+
+    def save(
+        self,
+        domain_override=None,
+        subject_template_name="registration/password_reset_subject.txt",
+        email_template_name="registration/password_reset_email.html",
+        use_https=False,
+        token_generator=None,
+        from_email=None,
+        request=None,
+        html_email_template_name=None,
+        extra_email_context=None,
+    ):
+        # token_generator не сериализуется: воркер всегда берёт
+        # default_token_generator
+        if not domain_override:
+            current_site = get_current_site(request)
+            site_name = current_site.name
+            domain = current_site.domain
+        else:
+            site_name = domain = domain_override
+        for user in self.get_users(self.cleaned_data["email"]):
+            send_password_reset.delay(
+                user.pk,
+                domain,
+                site_name,
+                use_https,
+                subject_template_name,
+                email_template_name,
+                from_email,
+                html_email_template_name,
+                extra_email_context,
+            )
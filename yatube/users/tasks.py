@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from taskqueue.queue import task
+
+User = get_user_model()
+
+
+@task
+def send_mail(subject, body, from_email, recipients, html_body=None):
+    message = EmailMultiAlternatives(subject, body, from_email, recipients)
+    if html_body is not None:
+        message.attach_alternative(html_body, "text/html")
+    message.send()
+
+
+@task
+def send_password_reset(
+    user_id,
+    domain,
+    site_name,
+    use_https,
+    subject_template_name,
+    email_template_name,
+    from_email=None,
+    html_email_template_name=None,
+    extra_email_context=None,
+):
+    """Токен и письмо собираются здесь, в очереди их нет."""
+    user = User._default_manager.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return
+    context = {
+        "email": user.email,
+        "domain": domain,
+        "site_name": site_name,
+        "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+        "user": user,
+        "token": default_token_generator.make_token(user),
+        "protocol": "https" if use_https else "http",
+        **(extra_email_context or {}),
+    }
+    subject = loader.render_to_string(subject_template_name, context)
+    subject = "".join(subject.splitlines())
+    body = loader.render_to_string(email_template_name, context)
+    html_body = None
+    if html_email_template_name is not None:
+        html_body = loader.render_to_string(html_email_template_name, context)
+    send_mail(subject, body, from_email, [user.email], html_body)
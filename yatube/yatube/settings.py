@@ -27,6 +27,8 @@ INSTALLED_APPS = [
     "posts.apps.PostsConfig",
     "core.apps.CoreConfig",
     "users.apps.UsersConfig",
+    "benchmarks.apps.BenchmarksConfig",
+    "taskqueue.apps.TaskQueueConfig",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -37,6 +39,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.ReplicaPinningMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -52,7 +56,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.template_backends.TimedDjangoTemplates",
         # Добавлено: Искать шаблоны на уровне проекта
         "DIRS": [TEMPLATES_DIR],
         "APP_DIRS": True,
@@ -63,11 +67,19 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "core.context_processors.year.year",
+                "posts.context_processors.feed_cache",
             ],
         },
     },
 ]
 
+# Падать, если в контекст шаблона попал QuerySet без LIMIT; в тестах
+# включает core.test_runner.AuditingTestRunner
+TEMPLATE_CONTEXT_AUDIT = False
+TEST_RUNNER = "core.test_runner.AuditingTestRunner"
+
+# Асинхронные представления и ASGI требуют Django 3.1+, а проект на 2.2.
+# Пропускная способность под нагрузкой: manage.py benchmark --concurrency N
 WSGI_APPLICATION = "yatube.wsgi.application"
 
 
@@ -76,10 +88,37 @@ WSGI_APPLICATION = "yatube.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "core.db",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
     }
 }
+# PRAGMA для каждого нового соединения SQLite (core.db)
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
+    # Отрицательное значение - в КиБ
+    "cache_size": -64 * 1024,
+    "busy_timeout": 5000,
+    "temp_store": "memory",
+}
+# Транзакции с BEGIN IMMEDIATE: запись ждёт busy_timeout, а не падает
+SQLITE_IMMEDIATE_TRANSACTIONS = True
+# Чтение с реплик, запись в default (core.routers). С реплик читают
+# только запросы GET и HEAD; команды и задачи очереди — из default.
+# Реплика описывается в DATABASES и перечисляется здесь, например:
+#   DATABASES["replica"] = {
+#       "ENGINE": "core.db",
+#       "NAME": os.path.join(BASE_DIR, "db_replica.sqlite3"),
+#       "TEST": {"MIRROR": "default"},
+#   }
+#   DATABASE_REPLICAS = ["replica"]
+# Локальную реплику SQLite обновляет manage.py sync_replicas.
+DATABASE_ROUTERS = ["core.routers.PrimaryReplicaRouter"]
+DATABASE_REPLICAS = []
+# Сколько секунд после записи клиент читает из default
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = "pin_primary"
 
 
 # Password validation
@@ -132,6 +171,21 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 DEFAULT_POSTS_ON_PAGE = 10
+# Комментариев на странице поста и в каждой подгрузке
+COMMENTS_ON_PAGE = 20
+# Ленты с keyset-пагинацией (?cursor=) вместо COUNT(*) + OFFSET:
+# любые из "index", "group_posts", "profile", "follow_index"
+CURSOR_PAGINATED_VIEWS = ()
+# follow_index читает материализованную ленту (TimelineEntry);
+# миграция 0013 заполняет её по существующим подпискам, а после
+# повторного включения нужно запустить manage.py backfill_timelines
+FOLLOW_FEED_FANOUT = True
+FOLLOW_FEED_BATCH_SIZE = 500
+# Движок поиска (posts.search.BaseSearchEngine); None — выбрать по базе:
+# FTS5 на SQLite, LIKE без индекса на остальных
+POSTS_SEARCH_ENGINE = None
+# Сколько совпадений поиска просматривает админка
+POSTS_ADMIN_SEARCH_LIMIT = 1000
 
 CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 
@@ -139,8 +193,61 @@ CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Ограничения картинок постов; проверяются по мере загрузки
+# (posts.uploads.validate_image_uploads в post_create и post_edit)
+POST_IMAGE_MAX_SIZE = 5 * 1024 * 1024
+POST_IMAGE_MAX_DIMENSIONS = (6000, 6000)
+
+# Миниатюры картинок постов: имя -> (геометрия, опции sorl-thumbnail).
+# Строятся задачей очереди после сохранения поста; шаблоны берут
+# только готовые (существующие картинки: manage.py build_thumbnails)
+POST_THUMBNAILS = {
+    "card": ("960x339", {"crop": "center", "upscale": True}),
+}
+# Варианты картинки для <picture>/srcset: ширины (в кадре "card") и
+# форматы сверх исходного; форматы без поддержки в Pillow пропускаются
+POST_IMAGE_WIDTHS = (480, 960, 1440)
+POST_IMAGE_FORMATS = ("avif", "webp")
+
+# Фрагменты лент инвалидируются версией (posts.cache), а не TTL
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+# После истечения фрагмент ещё столько секунд отдаётся устаревшим,
+# пока один воркер его пересчитывает ({% stale_cache %})
+FEED_CACHE_STALE_TIMEOUT = 60
+FEED_CACHE_LOCK_TIMEOUT = 10
+FEED_CACHE_LOCK_WAIT = 0.5
+# Граф подписок в кэше (posts.follow_graph); записи Follow сбрасывают
+# его после коммита, срок ограничивает расхождение после bulk-операций
+FOLLOW_GRAPH_TIMEOUT = 60 * 60 * 24
+# "Кого почитать" (posts.recommendations): сколько авторов хранить на
+# пользователя, сколько показывать и по скольку пользователей считать
+RECOMMENDATIONS_TOP = 20
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_BATCH_SIZE = 500
+
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
+
+# Метрики запросов (core.middleware.MetricsMiddleware), /metrics
+METRICS_CACHE = "default"
+# Заголовки X-Query-Count и Server-Timing в каждом ответе
+METRICS_HEADERS = DEBUG
+INTERNAL_IPS = ["127.0.0.1"]
+
+# Очередь фоновых задач (taskqueue): выполняет manage.py runworker
+TASKS_ALWAYS_EAGER = False
+TASKS_WORKERS = 4
+TASKS_POLL_INTERVAL = 1.0
+TASKS_MAX_ATTEMPTS = 5
+# Задержка перед повтором, секунд; удваивается с каждой попыткой
+TASKS_RETRY_DELAY = 10
+# Задача, взятая воркером дольше этого, возвращается в очередь
+TASKS_LOCK_TIMEOUT = 10 * 60
+# Периодические задачи: имя -> интервал, секунд
+TASKS_PERIODIC = {
+    "posts.tasks.reconcile_counters": 60 * 60,
+    "posts.tasks.build_recommendations": 60 * 60 * 24,
+}